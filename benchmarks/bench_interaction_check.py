@@ -0,0 +1,60 @@
+"""Commands per second through the registered-player interaction check, with and without the in-memory cache.
+
+Runs --commands checks (--concurrency at a time) for random registered players, once querying
+players_table per check like the cogs used to and once answering from RegisteredPlayers.
+Uses the database configured in .env, the players table must contain at least one player.
+
+Usage: python -m benchmarks.bench_interaction_check [--commands 2000] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import random
+import time
+from database import AsyncSessionLocal, engine
+from models.player import Player
+from utils.player_cache import RegisteredPlayers
+
+
+async def database_check(discord_id: int) -> bool:
+    async with AsyncSessionLocal() as session:
+        return await Player.exists(session, discord_id)
+
+
+async def run(check, discord_ids, commands: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def command():
+        async with semaphore:
+            assert await check(random.choice(discord_ids))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(command() for _ in range(commands)))
+    return commands / (time.perf_counter() - started)
+
+
+async def main(args):
+    registered_players = RegisteredPlayers()
+    async with AsyncSessionLocal() as session:
+        await registered_players.warm_up(session)
+    discord_ids = list(registered_players.discord_ids)
+    if not discord_ids:
+        raise SystemExit("players_table is empty, register a player first")
+
+    async def cache_check(discord_id: int) -> bool:
+        return discord_id in registered_players
+
+    try:
+        uncached = await run(database_check, discord_ids, args.commands, args.concurrency)
+        cached = await run(cache_check, discord_ids, args.commands, args.concurrency)
+    finally:
+        await engine.dispose()
+    print(f"players: {len(discord_ids)}, commands: {args.commands}, concurrency: {args.concurrency}")
+    print(f"database check: {uncached:.0f} commands/s")
+    print(f"cached check:   {cached:.0f} commands/s ({cached / uncached:.0f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,55 @@
+"""Throughput of the account refresh path against the offline Riot stub.
+
+Refreshes --accounts synthetic accounts through fetch_account_updates while the stub enforces
+a Riot-style app rate limit, then reports accounts/s, calls/s and how many 429s reached the stub.
+
+Usage: python -m benchmarks.bench_rank_refresh [--accounts 300] [--app-rate-limit 50:1,1500:60] [--latency 0.03]
+"""
+import argparse
+import asyncio
+import time
+import aiohttp
+from benchmarks.riot_stub import RiotStub, load_fixtures, start_stub
+from models.account import Account
+from utils.rate_limiter import RoutingPools
+from utils.rank_refresh import fetch_account_updates
+from utils.riot_client import PooledRiotAPIClient
+
+
+async def main(args):
+    stub = RiotStub(load_fixtures(), latency=args.latency, jitter=args.latency / 4, app_rate_limit=args.app_rate_limit,
+                    rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate, seed=1)
+    runner, base_url = await start_stub(stub.create_app())
+    routing_pools = RoutingPools(default_app_limit=args.app_rate_limit if args.limiter == "seeded" else "")
+    accounts = [Account(id=i, server="EUW" if i % 2 else "EUNE", puuid=f"bench-{i}", summoner_name=f"Bench{i}", summoner_tag="EUW", summoner_id=f"summoner-bench-{i}")
+                for i in range(args.accounts)]
+    try:
+        async with PooledRiotAPIClient(base_url=base_url, default_headers={"X-Riot-Token": "stub"}, routing_pools=routing_pools) as client:
+            started = time.perf_counter()
+            results = await fetch_account_updates(client, accounts, concurrency=args.concurrency)
+            elapsed = time.perf_counter() - started
+        async with aiohttp.ClientSession() as session:
+            async with session.get(base_url.removesuffix("/{region}") + "/_stub/stats") as response:
+                stats = await response.json()
+    finally:
+        await runner.cleanup()
+
+    failed = sum(1 for _, _, error in results if error)
+    print(f"accounts: {args.accounts} ({failed} failed) in {elapsed:.2f}s -> {(args.accounts - failed) / elapsed:.1f} accounts/s, "
+          f"{stats.get('requests', 0) / elapsed:.1f} calls/s")
+    print(f"stub: {stats}")
+    for pool in routing_pools:
+        print(f"limiter {pool.routing}: {pool.rate_limiter.throttled} waits for a token, {pool.rate_limiter.rate_limited} 429s queued for retry")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--app-rate-limit", default="50:1,1500:60")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--limiter", choices=["seeded", "learned"], default="learned",
+                        help="seed the limiter with the stub's limit, or start empty and learn it from the headers")
+    asyncio.run(main(parser.parse_args()))
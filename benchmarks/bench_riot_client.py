@@ -0,0 +1,62 @@
+"""Per-lookup latency of a fresh RiotAPIClient per call vs the bot's shared pooled client.
+
+Usage: python -m benchmarks.bench_riot_client [--lookups 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from benchmarks.riot_stub import create_app, start_stub
+from utils.rate_limiter import RoutingPools
+from utils.riot_client import PooledRiotAPIClient
+from utils.util_funcs import get_account_info_from_puuid
+
+
+async def time_lookups(lookups: int, lookup):
+    timings = []
+    for i in range(lookups):
+        start = time.perf_counter()
+        await lookup(f"player-{i}")
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings: list):
+    print(f"{label:<22} mean {statistics.mean(timings):7.3f}ms  p50 {statistics.median(timings):7.3f}ms  "
+          f"p95 {statistics.quantiles(timings, n=20)[-1]:7.3f}ms")
+
+
+async def main(lookups: int, latency: float):
+    runner, base_url = await start_stub(create_app(latency))
+    headers = {"X-Riot-Token": "stub"}
+    # The stub sends no rate limit headers, an empty default keeps the limiter out of the timings
+    unlimited = lambda: RoutingPools(default_app_limit="")
+    try:
+        async def fresh_lookup(puuid):
+            async with PooledRiotAPIClient(base_url=base_url, default_headers=headers, routing_pools=unlimited()) as client:
+                await get_account_info_from_puuid(client, puuid, "euw1")
+
+        shared = PooledRiotAPIClient(base_url=base_url, default_headers=headers, routing_pools=unlimited())
+        await shared.start()
+
+        async def shared_lookup(puuid):
+            await get_account_info_from_puuid(shared, puuid, "euw1", bypass_cache=True)
+
+        fresh = await time_lookups(lookups, fresh_lookup)
+        pooled = await time_lookups(lookups, shared_lookup)
+        await shared.close()
+    finally:
+        await runner.cleanup()
+
+    report("client per lookup", fresh)
+    report("shared pooled client", pooled)
+    print(f"saved per lookup: {statistics.mean(fresh) - statistics.mean(pooled):.3f}ms "
+          f"(3 Riot calls each, plain HTTP; TLS handshakes against the real API add more)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.lookups, args.latency))
@@ -0,0 +1,44 @@
+"""Latency of team autocomplete lookups in the in-memory TeamIndex as the number of teams grows.
+
+Fills a TeamIndex with synthetic teams and times --lookups random 1-3 character prefixes,
+the lookup behind every autocomplete keystroke, reporting the median and worst case.
+
+Usage: python -m benchmarks.bench_team_search [--teams 1000,10000,100000] [--lookups 10000]
+"""
+import argparse
+import random
+import string
+import time
+from types import SimpleNamespace
+from utils.team_index import TeamIndex
+
+
+def random_word(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length)).title()
+
+
+def main(args):
+    rng = random.Random(1)
+    for count in (int(value) for value in args.teams.split(",")):
+        teams = [SimpleNamespace(id=team_id, name=" ".join(random_word(rng, rng.randint(3, 8)) for _ in range(rng.randint(1, 3))), tag=random_word(rng, 4).upper())
+                 for team_id in range(count)]
+        index = TeamIndex()
+        started = time.perf_counter()
+        index.load(teams)
+        build = time.perf_counter() - started
+
+        timings = list()
+        for _ in range(args.lookups):
+            prefix = random_word(rng, rng.randint(1, 3))
+            started = time.perf_counter()
+            index.search(prefix)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(f"teams: {count:>7}  build: {build:.2f}s  lookup median: {timings[len(timings) // 2] * 1e6:.1f}us  max: {timings[-1] * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", default="1000,10000,100000")
+    parser.add_argument("--lookups", type=int, default=10000)
+    main(parser.parse_args())
@@ -0,0 +1,95 @@
+"""Checks with EXPLAIN that the fetchers in models/ are served by the indexes added in migrations/.
+
+Each fetcher runs against the database configured in .env while its SQL is captured, then the same
+statement is explained with sequential scans disabled, so the check proves the planner can use the
+index for that query whatever the table sizes are. Migrate the database first (python -m migrations).
+Exits with status 1 if a fetcher's plan does not use one of its expected indexes.
+
+Usage: python -m benchmarks.explain_indexes
+"""
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import engine
+from models import Account, Invite, LeaderboardEntry, Player, Strike, Team, Transfer
+
+# (fetcher, call, indexes the plan may use)
+CHECKS = [
+    ("Player.fetch_all_from_team_id", lambda session: Player.fetch_all_from_team_id(session, 1), {"ix_players_team_id"}),
+    ("Account.fetch_all_from_player_id", lambda session: Account.fetch_all_from_player_id(session, 1), {"ix_accounts_player_id"}),
+    ("Account.fetch_top_from_server", lambda session: Account.fetch_top_from_server(session, "EUW"), {"ix_accounts_server_numerical_lp"}),
+    ("Invite.fetch_active_invites_by_invitee", lambda session: Invite.fetch_active_invites_by_invitee(session, 1), {"ix_invites_invitee_active"}),
+    ("Invite.fetch_active_invites_by_inviter", lambda session: Invite.fetch_active_invites_by_inviter(session, 1), {"ix_invites_inviter_active"}),
+    ("Invite.fetch_active_invite_by_team_id_and_invitee", lambda session: Invite.fetch_active_invite_by_team_id_and_invitee(session, 1, 1), {"ix_invites_invitee_active"}),
+    ("Invite.expire_overdue", lambda session: Invite.expire_overdue(session), {"ix_invites_expires_active"}),
+    ("Transfer.fetch_all_team_transfers_from_team_id", lambda session: Transfer.fetch_all_team_transfers_from_team_id(session, 1), {"ix_transfers_team_history"}),
+    ("Transfer.fetch_history (team page)", lambda session: Transfer.fetch_history(session, team_id=1, before=(datetime.now(), 1), from_date=datetime.now() - timedelta(days=30), limit=11), {"ix_transfers_team_history"}),
+    ("Transfer.fetch_history (player page)", lambda session: Transfer.fetch_history(session, player_id=1, before=(datetime.now(), 1), limit=11), {"ix_transfers_player_history"}),
+    ("Strike.fetch_active_user_strikes", lambda session: Strike.fetch_active_user_strikes(session, 1), {"ix_strikes_issued_for_expires"}),
+    ("Strike.fetch_active_team_strikes", lambda session: Strike.fetch_active_team_strikes(session, 1), {"ix_strikes_team_expires"}),
+    ("Team.fetch_from_tag", lambda session: Team.fetch_from_tag(session, "TAG"), {"ix_teams_tag_active", "ux_teams_tag_active"}),
+    ("Team.tag_exists_and_active", lambda session: Team.tag_exists_and_active(session, "TAG"), {"ix_teams_tag_active", "ux_teams_tag_active"}),
+    ("Team.name_exists_and_active", lambda session: Team.name_exists_and_active(session, "Name"), {"ux_teams_name_active"}),
+    ("LeaderboardEntry.fetch_page", lambda session: LeaderboardEntry.fetch_page(session, "EUW", after=10), {"ix_leaderboard_position"}),
+    ("LeaderboardEntry.fetch_page (role)", lambda session: LeaderboardEntry.fetch_page(session, "EUW", role="Mid", after=10), {"ix_leaderboard_role_position"}),
+    ("LeaderboardEntry.fetch_page (league)", lambda session: LeaderboardEntry.fetch_page(session, "EUW", league="Prime", after=10), {"ix_leaderboard_league_position"}),
+    ("LeaderboardEntry.fetch_page (role and league)", lambda session: LeaderboardEntry.fetch_page(session, "EUW", role="Mid", league="Prime", after=10), {"ix_leaderboard_role_league_position"}),
+]
+
+
+def plan_indexes(plan: dict) -> set:
+    indexes = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        indexes |= plan_indexes(child)
+    return indexes
+
+
+async def explain(conn, call) -> set:
+    statements = list()
+
+    def capture(_conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(conn.sync_connection, "before_cursor_execute", capture)
+    try:
+        await call(AsyncSession(bind=conn))
+    finally:
+        event.remove(conn.sync_connection, "before_cursor_execute", capture)
+
+    indexes = set()
+    for statement, parameters in statements:
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar_one()
+        indexes |= plan_indexes((json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"])
+    return indexes
+
+
+async def main() -> int:
+    failures = 0
+    try:
+        async with engine.connect() as conn:
+            for name, call, expected in CHECKS:
+                async with conn.begin() as transaction:
+                    await conn.execute(text("SET LOCAL enable_seqscan = off"))
+                    try:
+                        used = await explain(conn, call)
+                    except Exception as e:
+                        used, error = set(), e
+                    else:
+                        error = None
+                    await transaction.rollback()
+                ok = bool(used & expected)
+                failures += not ok
+                detail = f"error: {error}" if error else f"uses {', '.join(sorted(used)) or 'no index'}"
+                print(f"{'PASS' if ok else 'FAIL'}  {name}: {detail}")
+    finally:
+        await engine.dispose()
+    print(f"{len(CHECKS) - failures}/{len(CHECKS)} fetchers use their index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
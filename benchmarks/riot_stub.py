@@ -0,0 +1,220 @@
+"""Offline stand-in for the Riot API endpoints used by utils/util_funcs.py and utils/rank_refresh.py.
+
+Serves account-v1, summoner-v4 and league-v4 from recorded fixtures (benchmarks/fixtures/riot.json),
+synthesising deterministic data for unknown players unless --strict is given. Latency, Riot-style
+rate limits (with X-*-Rate-Limit headers and 429 + Retry-After) and random errors can be injected.
+
+Usage: python -m benchmarks.riot_stub [--port 8085] [--latency 0.03] [--app-rate-limit 20:1,100:120] [--error-rate 0.01]
+Run the bot against it with RIOT_API_BASE_URL=http://127.0.0.1:8085/{region}
+Counters are available at GET /_stub/stats and reset with POST /_stub/reset.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from aiohttp import web
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "riot.json")
+TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND"]
+RANKS = ["IV", "III", "II", "I"]
+
+
+def parse_limits(value: str):
+    return [tuple(int(v) for v in part.split(":")) for part in value.split(",")] if value else []
+
+
+class FixedWindowLimiter:
+    """Counts requests in fixed windows the way Riot does, per key."""
+    def __init__(self, limits):
+        self.limits = limits
+        self.windows = defaultdict(lambda: [0.0, 0])
+
+    def hit(self, key):
+        """Count a request, returns (count header, retry_after or None)."""
+        now = time.monotonic()
+        counts, retry_after = [], None
+        for limit, window in self.limits:
+            state = self.windows[(key, window)]
+            if now - state[0] >= window:
+                state[0], state[1] = now, 0
+            state[1] += 1
+            counts.append(f"{state[1]}:{window}")
+            if state[1] > limit:
+                retry_after = max(retry_after or 0, int(state[0] + window - now) + 1)
+        return ",".join(counts), retry_after
+
+
+class RiotStub:
+    def __init__(self, fixtures: dict = None, latency: float = 0.0, jitter: float = 0.0, app_rate_limit: str = "",
+                 method_rate_limit: str = "", rate_limit_rate: float = 0.0, error_rate: float = 0.0, strict: bool = False, seed: int = None):
+        fixtures = fixtures or {"accounts": [], "apex": {}}
+        self.accounts_by_puuid = {account["puuid"]: account for account in fixtures["accounts"]}
+        self.accounts_by_riot_id = {(a["gameName"].lower(), a["tagLine"].lower()): a for a in fixtures["accounts"]}
+        self.accounts_by_summoner_id = {a["summoner"]["id"]: a for a in fixtures["accounts"]}
+        self.apex = fixtures.get("apex", {})
+        self.latency = latency
+        self.jitter = jitter
+        self.app_rate_limit = app_rate_limit
+        self.method_rate_limit = method_rate_limit
+        self.app_limiter = FixedWindowLimiter(parse_limits(app_rate_limit))
+        self.method_limiter = FixedWindowLimiter(parse_limits(method_rate_limit))
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.strict = strict
+        self.random = random.Random(seed)
+        self.stats = defaultdict(int)
+
+    def synthesize(self, puuid: str, game_name: str = None, tag_line: str = "EUW"):
+        digest = int(hashlib.sha1(puuid.encode()).hexdigest(), 16)
+        return {
+            "puuid": puuid,
+            "gameName": game_name or f"Stub{digest % 100000}",
+            "tagLine": tag_line,
+            "summoner": {"id": f"summoner-{puuid}", "puuid": puuid, "profileIconId": digest % 20, "summonerLevel": 30 + digest % 500},
+            "entries": [{
+                "queueType": "RANKED_SOLO_5x5", "summonerId": f"summoner-{puuid}", "puuid": puuid,
+                "tier": TIERS[digest % len(TIERS)], "rank": RANKS[digest // 7 % len(RANKS)],
+                "leaguePoints": digest % 100, "wins": digest % 300, "losses": digest // 3 % 300,
+            }] if digest % 5 else [],
+        }
+
+    def find(self, puuid: str = None, riot_id: tuple = None, summoner_id: str = None):
+        if puuid is not None:
+            account = self.accounts_by_puuid.get(puuid)
+        elif riot_id is not None:
+            account = self.accounts_by_riot_id.get((riot_id[0].lower(), riot_id[1].lower()))
+            puuid = f"puuid-{riot_id[0].lower()}-{riot_id[1].lower()}"
+        else:
+            account = self.accounts_by_summoner_id.get(summoner_id)
+            puuid = summoner_id.removeprefix("summoner-")
+        if account is None and not self.strict:
+            account = self.synthesize(puuid, *(riot_id or ()))
+        if account is None:
+            raise web.HTTPNotFound(text=json.dumps({"status": {"message": "Data not found", "status_code": 404}}), content_type="application/json")
+        return account
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        if request.path.startswith("/_stub"):
+            return await handler(request)
+        self.stats["requests"] += 1
+        region = request.match_info.get("region", "")
+        method = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        headers = {}
+        if self.app_rate_limit:
+            headers["X-App-Rate-Limit"] = self.app_rate_limit
+            headers["X-App-Rate-Limit-Count"], app_retry = self.app_limiter.hit(region)
+        else:
+            app_retry = None
+        if self.method_rate_limit:
+            headers["X-Method-Rate-Limit"] = self.method_rate_limit
+            headers["X-Method-Rate-Limit-Count"], method_retry = self.method_limiter.hit((region, method))
+        else:
+            method_retry = None
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+
+        if app_retry or method_retry:
+            self.stats["rate_limited"] += 1
+            headers.update({"Retry-After": str(max(app_retry or 0, method_retry or 0)), "X-Rate-Limit-Type": "application" if app_retry else "method"})
+            return web.json_response({"status": {"message": "Rate limit exceeded", "status_code": 429}}, status=429, headers=headers)
+        if self.random.random() < self.rate_limit_rate:
+            self.stats["injected_429"] += 1
+            headers.update({"Retry-After": "1", "X-Rate-Limit-Type": "service"})
+            return web.json_response({"status": {"message": "Rate limit exceeded", "status_code": 429}}, status=429, headers=headers)
+        if self.random.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            status = self.random.choice([500, 503])
+            return web.json_response({"status": {"message": "Injected error", "status_code": status}}, status=status, headers=headers)
+
+        try:
+            response = await handler(request)
+        except web.HTTPNotFound:
+            self.stats["not_found"] += 1
+            raise
+        response.headers.update(headers)
+        self.stats["ok"] += 1
+        return response
+
+    async def account_by_riot_id(self, request: web.Request):
+        account = self.find(riot_id=(request.match_info["game_name"], request.match_info["tag_line"]))
+        return web.json_response({key: account[key] for key in ("puuid", "gameName", "tagLine")})
+
+    async def account_by_puuid(self, request: web.Request):
+        account = self.find(puuid=request.match_info["puuid"])
+        return web.json_response({key: account[key] for key in ("puuid", "gameName", "tagLine")})
+
+    async def summoner_by_puuid(self, request: web.Request):
+        return web.json_response(self.find(puuid=request.match_info["puuid"])["summoner"])
+
+    async def entries_by_summoner(self, request: web.Request):
+        return web.json_response(self.find(summoner_id=request.match_info["summoner_id"])["entries"])
+
+    def apex_league(self, tier: str):
+        async def handler(request: web.Request):
+            league = self.apex.get(request.match_info["region"], {}).get(tier, {"entries": []})
+            return web.json_response({"tier": tier, "queue": request.match_info["queue"], "name": f"Stub {tier.title()}", **league})
+        return handler
+
+    async def stats_handler(self, request: web.Request):
+        return web.json_response(dict(self.stats))
+
+    async def reset_handler(self, request: web.Request):
+        self.stats.clear()
+        return web.json_response({})
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/_stub/stats", self.stats_handler)
+        app.router.add_post("/_stub/reset", self.reset_handler)
+        app.router.add_get("/{region}/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}", self.account_by_riot_id)
+        app.router.add_get("/{region}/riot/account/v1/accounts/by-puuid/{puuid}", self.account_by_puuid)
+        app.router.add_get("/{region}/lol/summoner/v4/summoners/by-puuid/{puuid}", self.summoner_by_puuid)
+        app.router.add_get("/{region}/lol/league/v4/entries/by-summoner/{summoner_id}", self.entries_by_summoner)
+        for tier in ("CHALLENGER", "GRANDMASTER", "MASTER"):
+            app.router.add_get(f"/{{region}}/lol/league/v4/{tier.lower()}leagues/by-queue/{{queue}}", self.apex_league(tier))
+        return app
+
+
+def load_fixtures(path: str = FIXTURES_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def create_app(latency: float = 0.0, **kwargs) -> web.Application:
+    return RiotStub(load_fixtures(), latency=latency, **kwargs).create_app()
+
+
+async def start_stub(app: web.Application, host: str = "127.0.0.1", port: int = 0):
+    """Start the stub in the running loop, returns (runner, base_url)."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}/{{region}}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="standard deviation of the latency in seconds")
+    parser.add_argument("--app-rate-limit", default="", help='enforced app limit per region, e.g. "20:1,100:120"')
+    parser.add_argument("--method-rate-limit", default="", help='enforced limit per region and endpoint, e.g. "2000:60"')
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with a service 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 5xx")
+    parser.add_argument("--strict", action="store_true", help="404 for players that are not in the fixtures")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    stub = RiotStub(load_fixtures(args.fixtures), latency=args.latency, jitter=args.jitter, app_rate_limit=args.app_rate_limit,
+                    method_rate_limit=args.method_rate_limit, rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate,
+                    strict=args.strict, seed=args.seed)
+    web.run_app(stub.create_app(), host=args.host, port=args.port)
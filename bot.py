@@ -1,30 +1,70 @@
 from discord.ext import commands
+from discord import app_commands
 import discord
 from cogs.general import General
 from cogs.admin import Admin
 from cogs.team import TeamCog
 from cogs.account import AccountCog
 from cogs.error_handler import ErrorHandler
-from database import init_db, get_db
+from database import init_db, get_db, AsyncSessionLocal
 
 import os
 from dotenv import load_dotenv
 import logging
 
 from utils.views import InviteApprovalView
+from utils.riot_client import PooledRiotAPIClient
+from utils.verification import OwnershipVerifier
+from utils.player_cache import RegisteredPlayers
+from utils.team_index import TeamIndex
+from utils.team_strength import TeamStrengthCache
+from utils.strike_engine import StrikeCounters
+from utils.transfer_journal import TransferJournal
+from utils.unit_of_work import finish_unit_of_work
 
 load_dotenv()
 logging.basicConfig(level=logging.ERROR)
 
+class PPLCommandTree(app_commands.CommandTree):
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        await finish_unit_of_work(interaction)
+        await super().on_error(interaction, error)
+
 class PPLBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.all()
-        super().__init__(command_prefix='!', intents=intents)
+        super().__init__(command_prefix='!', intents=intents, tree_cls=PPLCommandTree)
+        self.riot_client = PooledRiotAPIClient()
+        self.verifier = OwnershipVerifier(self.riot_client)
+        self.registered_players = RegisteredPlayers()
+        self.team_index = TeamIndex()
+        self.team_strength = TeamStrengthCache()
+        self.strikes = StrikeCounters()
+        self.transfer_journal = TransferJournal(self)
 
     async def setup_hook(self):
+        await self.riot_client.start()
+        async with AsyncSessionLocal() as session:
+            await self.registered_players.warm_up(session)
+            await self.team_index.warm_up(session)
+            await self.strikes.warm_up(session)
         self.add_view(InviteApprovalView(0))
+        self.transfer_journal.start()
         await self.load_cogs()
 
+    async def close(self):
+        # Buffered transfers are written and posted while the connection to Discord is still open
+        try:
+            await self.transfer_journal.close()
+        except Exception as e:
+            logging.error(f"Transfer journal could not write {len(self.transfer_journal.events)} transfers on shutdown: {e}")
+        await super().close()
+        await self.verifier.close()
+        await self.riot_client.close()
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        await finish_unit_of_work(interaction)
+
     async def load_cogs(self):
         for filename in os.listdir('./cogs'):
             if filename.endswith('.py') and not filename.startswith('_'):
@@ -1,16 +1,17 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from models.player import Player
 from utils.embed_gen import EmbedGenerator
 from database import AsyncSessionLocal
-from utils.views import ConfirmView
-from utils.util_funcs import get_account_info, get_account_info_from_puuid
-from models.account import Account
+from utils.unit_of_work import unit_of_work
+from utils.util_funcs import get_account_info
+from utils.rank_refresh import apply_account_update, fetch_account_updates
+from models.account import Account, AccountAlreadyExists
+from models.rank_history import RankSnapshot
 from random import choice
 from datetime import datetime
-from utils.enums import LeagueServer, LeagueTier, LeagueRank
-from config import GUILD_ID
+from utils.enums import LeagueServer
+from config import GUILD_ID, VERIFICATION_DEADLINE_SECONDS
 
 class AccountCog(commands.GroupCog, group_name="account", description="Account management commands"):
     def __init__(self, bot):
@@ -19,9 +20,8 @@ class AccountCog(commands.GroupCog, group_name="account", description="Account m
     
     # Interaction check to ensure user is registered
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        async with AsyncSessionLocal() as session:
-            if not await Player.exists(session, interaction.user.id):
-                return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="You are not registered, please use the /register command"), ephemeral=True)
+        if interaction.user.id not in self.bot.registered_players:
+            return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="You are not registered, please use the /register command"), ephemeral=True)
         return True
     
     @app_commands.command()
@@ -37,19 +37,23 @@ class AccountCog(commands.GroupCog, group_name="account", description="Account m
             The server of the account.
         """
         # Check if the account already exists in database
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             if await Account.check_if_username_and_tag_exists(session, username, tag, LeagueServer(server.value).name):
                 print(await Account.check_if_username_and_tag_exists(session, username, tag, LeagueServer(server.value).name))
                 return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Account already exists"), ephemeral=True)
+        # No connection is held while the Riot lookups wait on the rate limiter
+        await unit_of_work(interaction).close()
         
         # Check if account is valid and fetch account info
         try:
-            _, initial_summoner, _ = await get_account_info(username, tag, server.value)
+            riot_account, initial_summoner, _ = await get_account_info(self.bot.riot_client, username, tag, server.value)
             current_icon_id = initial_summoner["profileIconId"]
         except Exception as e:
             error_message = str(e)
             if "404" in error_message:
                 return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Account not found, please check the username and tag are correct"), ephemeral=True)
+            elif "429" in error_message:
+                return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="The Riot API is busy right now, please try again in a minute"), ephemeral=True)
             else:
                 return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"Error fetching account, share the error message with the developers: {error_message}"), ephemeral=True)
         
@@ -57,55 +61,50 @@ class AccountCog(commands.GroupCog, group_name="account", description="Account m
         random_id = choice([i for i in range(0, 20) if i != current_icon_id])
         url = f"https://ddragon.leagueoflegends.com/cdn/14.11.1/img/profileicon/{random_id}.png"
         
-        # Send the confirmation message
-        view = ConfirmView()
+        # Send the instructions, the verifier polls the icon in the background and edits this message when done
         await interaction.response.send_message(
-            view=view,
-            embed=EmbedGenerator.default_embed(title="Confirm Account Ownership", description="Change the account's profile icon to the one shown to confirm ownership.").set_thumbnail(url=url),
+            embed=EmbedGenerator.default_embed(title="Confirm Account Ownership", description=f"Change the account's profile icon to the one shown to confirm ownership. "
+                                                                                              f"This message will update once the change is detected (within {VERIFICATION_DEADLINE_SECONDS // 60} minutes).").set_thumbnail(url=url),
             ephemeral=True
         )
-        await view.wait()
-
-        # if/else creates the embed based on the view value
-        if view.value is None or not view.value:
-            new_embed = EmbedGenerator.error_embed(title="Account Icon Change Failed", description="You must confirm to change the account icon.")
-        else:
-            # Fetch the account info again to compare the profile icon with the random one
-            updated_account, updated_summoner, updated_ranked = await get_account_info(username, tag, server.value)
-            # if updated_summoner["profileIconId"] != random_id:
-            #     return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Profile icon does not match"), ephemeral=True)
+        self.bot.verifier.start(interaction, riot_account, server.value, random_id, self.create_verified_account)
 
-            # Create dict with data to create the account in the database
-            account_data = {
-                "player_id": interaction.user.id,
-                "server": LeagueServer(server.value).name,  # Convert the enum to the server name, useful for op.gg links
-                "puuid": updated_account["puuid"],
-                "summoner_name": updated_account["gameName"],
-                "summoner_tag": updated_account["tagLine"],
-                "summoner_id": updated_summoner["id"],
-            }
+    async def create_verified_account(self, interaction: discord.Interaction, platform: str, riot_account: dict, summoner: dict, ranked: dict) -> discord.Embed:
+        # Create dict with data to create the account in the database
+        account_data = {
+            "player_id": interaction.user.id,
+            "server": LeagueServer(platform).name,  # Convert the enum to the server name, useful for op.gg links
+            "puuid": riot_account["puuid"],
+            "summoner_name": riot_account["gameName"],
+            "summoner_tag": riot_account["tagLine"],
+            "summoner_id": summoner["id"],
+        }
 
-            if updated_ranked:
-                account_data.update({
-                    "rank": updated_ranked["rank"],
-                    "tier": updated_ranked["tier"],
-                    "league_points": updated_ranked["leaguePoints"],
-                    "wins": updated_ranked["wins"],
-                    "losses": updated_ranked["losses"],
-                    "peak_tier": updated_ranked["tier"],
-                    "peak_rank": updated_ranked["rank"],
-                    "peak_league_points": updated_ranked["leaguePoints"],
-                    "peak_occurence": datetime.now()
-                })
-            
-            # Create the account in the database
-            async with AsyncSessionLocal() as session:
+        if ranked:
+            account_data.update({
+                "rank": ranked["rank"],
+                "tier": ranked["tier"],
+                "league_points": ranked["leaguePoints"],
+                "wins": ranked["wins"],
+                "losses": ranked["losses"],
+                "peak_tier": ranked["tier"],
+                "peak_rank": ranked["rank"],
+                "peak_league_points": ranked["leaguePoints"],
+                "peak_occurence": datetime.now()
+            })
+        
+        # Create the account in the database
+        async with AsyncSessionLocal() as session:
+            try:
                 account = await Account.create(session=session, **account_data)
+                if ranked:
+                    RankSnapshot.record(session, account)
                 await session.commit()
+            except AccountAlreadyExists:
+                return EmbedGenerator.error_embed(title="Error", description="Account already exists")
+        self.bot.team_strength.invalidate()
 
-            new_embed = EmbedGenerator.success_embed(title="Account Added", description="Account successfully added to the database.")
-            
-        await interaction.edit_original_response(embed=new_embed, view=None)
+        return EmbedGenerator.success_embed(title="Account Added", description="Account successfully added to the database.")
 
     @app_commands.command()
     async def update(self, interaction: discord.Interaction):
@@ -113,55 +112,37 @@ class AccountCog(commands.GroupCog, group_name="account", description="Account m
         """
         await interaction.response.defer(ephemeral=True)
         
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             accounts = await Account.fetch_all_from_player_id(session, interaction.user.id)
-            
-            if not accounts:
-                return await interaction.followup.send(embed=EmbedGenerator.error_embed(title="No accounts", description="You don't have any registered accounts to update."))
-            
-            updated_count = 0
-            for account in accounts:
-                
-                # Only keeping try/except for the riot api call, in case a player transfers accounts between servers (will likely raise error)
-                try:
-                    updated_account, updated_summoner, updated_ranked = await get_account_info_from_puuid(account.puuid, LeagueServer[account.server].value)
-                    account.summoner_name = updated_account["gameName"]
-                    account.summoner_tag = updated_account["tagLine"]
-                    account.summoner_id = updated_summoner["id"]
-                    account.last_updated = datetime.now()
-                    
-                    if updated_ranked:
-                        account.tier = updated_ranked["tier"]
-                        account.rank = updated_ranked["rank"]
-                        account.league_points = updated_ranked["leaguePoints"]
-                        account.wins = updated_ranked["wins"]
-                        account.losses = updated_ranked["losses"]
-                        
-                        # Update peak if current rank is higher
-                        # If current tier is higher, update peak
-                        # If current tier is same but current rank is higher, update peak
-                        # If current tier is same, current rank is same but current lp is higher, update peak
-                        if (LeagueTier[updated_ranked["tier"]].value > LeagueTier[account.peak_tier].value) or \
-                           (LeagueTier[updated_ranked["tier"]].value == LeagueTier[account.peak_tier].value and \
-                            LeagueRank[updated_ranked["rank"]].value > LeagueRank[account.peak_rank].value) or \
-                            (LeagueTier[updated_ranked["tier"]].value == LeagueTier[account.peak_tier].value and \
-                            LeagueRank[updated_ranked["rank"]].value == LeagueRank[account.peak_rank].value and \
-                            updated_ranked["leaguePoints"] > account.peak_league_points):
-                            account.peak_tier = updated_ranked["tier"]
-                            account.peak_rank = updated_ranked["rank"]
-                            account.peak_league_points = updated_ranked["leaguePoints"]
-                            account.peak_occurence = datetime.now()
-                    
-                    updated_count += 1
-                except Exception as e:
-                    print(f"Error updating account {account.summoner_name}#{account.summoner_tag}: {str(e)}")
-            
+        if not accounts:
+            return await interaction.followup.send(embed=EmbedGenerator.error_embed(title="No accounts", description="You don't have any registered accounts to update."))
+        # No connection is held while the Riot lookups wait on the rate limiter
+        await unit_of_work(interaction).close()
+
+        # Riot lookups run concurrently, the results are written back in a single commit
+        results = await fetch_account_updates(self.bot.riot_client, accounts)
+        failed = list()
+        async with unit_of_work(interaction) as session:
+            for account, data, error in results:
+                # A failure is likely a player transferring accounts between servers
+                if error:
+                    print(f"Error updating account {account.summoner_name}#{account.summoner_tag}: {str(error)}")
+                    failed.append(f"- {account} ({'not found' if '404' in str(error) else 'Riot API error'})")
+                    continue
+                session.add(account)
+                if apply_account_update(account, *data):
+                    RankSnapshot.record(session, account)
+
             await session.commit()
-        
+        self.bot.team_strength.invalidate()
+
+        updated_count = len(accounts) - len(failed)
         if updated_count == 0:
             embed = EmbedGenerator.error_embed(title="Update Failed", description="Failed to update any accounts. Please try again later.")
         else:
             embed = EmbedGenerator.success_embed(title="Accounts Updated", description=f"Successfully updated {updated_count} out of {len(accounts)} accounts.")
+        if failed:
+            embed.add_field(name="Not updated", value="\n".join(failed), inline=False)
         
         await interaction.followup.send(embed=embed)
 
@@ -1,15 +1,19 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from database import AsyncSessionLocal
+from utils.unit_of_work import round_trip_stats, unit_of_work
 from models.team import Team
 from models.player import Player
 from models.transfer import Transfer
-from models.team import TeamNameAlreadyExists, TeamTagAlreadyExists
+from models.team import TeamAlreadyExists, TeamNameAlreadyExists, TeamTagAlreadyExists
 from utils.embed_gen import EmbedGenerator
 from utils.enums import TeamLeague, TransferType
-from utils.util_funcs import player_join_team, player_leave_team
+from utils.util_funcs import get_discord_unix_timestamp_long, player_join_team
 from utils.views import ConfirmView
+from utils.team_archive import archive_team
+from utils.paginator import ButtonPaginator
+from utils.team_index import team_tag_autocomplete
+from utils.team_strength import approximate_rank
 from config import GUILD_ID, MODERATOR_ROLE, TAG_CHARACTER_LIMIT
 
 class Admin(commands.Cog):
@@ -21,9 +25,8 @@ class Admin(commands.Cog):
 
     # Interaction check to ensure user is registered
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        async with AsyncSessionLocal() as session:
-            if not await Player.exists(session, interaction.user.id):
-                return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="You are not registered, please use the /register command"), ephemeral=True)
+        if interaction.user.id not in self.bot.registered_players:
+            return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="You are not registered, please use the /register command"), ephemeral=True)
         member = interaction.guild.get_member(interaction.user.id)
         mod_role = discord.utils.get(interaction.guild.roles, id=MODERATOR_ROLE)
         if mod_role in member.roles:
@@ -67,7 +70,7 @@ class Admin(commands.Cog):
             The league of the team
         """
         try:
-            async with AsyncSessionLocal() as session:
+            async with unit_of_work(interaction) as session:
                 player = await Player.fetch_from_discord_id(session, captain.id)
                 if not player:
                     return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Player does not exist."))
@@ -86,12 +89,16 @@ class Admin(commands.Cog):
                 if not success:
                     return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=message))
                 await session.commit()
+            self.bot.team_index.add(team)
+            self.bot.team_strength.invalidate()
             
             await interaction.response.send_message(embed=EmbedGenerator.success_embed(title="Team Created", description=f"Successfully created **{name} ({tag})** [{league}]"))
         except TeamNameAlreadyExists:
             await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"A team with the name '{name}' already exists."))
         except TeamTagAlreadyExists:
             await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"A team with the tag '{tag}' already exists."))
+        except TeamAlreadyExists:
+            await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"A team with the name '{name}' or tag '{tag}' already exists."))
         except Exception as e:
             await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"An unexpected error occurred: {str(e)}"))
 
@@ -104,7 +111,7 @@ class Admin(commands.Cog):
         team_tag: str
             The tag of the team to create channels for
         """
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             team = await Team.fetch_from_tag(session, team_tag)
             if not team:
                 return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"Team with tag '{team_tag}' does not exist."))
@@ -132,6 +139,7 @@ class Admin(commands.Cog):
         await interaction.response.send_message(embed=EmbedGenerator.success_embed(title="Team Channels Created", description=f"Successfully created channels for team {team.name}."))
     
     @app_commands.command()
+    @app_commands.autocomplete(search_term=team_tag_autocomplete)
     async def editleague(self, interaction: discord.Interaction, search_term: str, league: TeamLeague):
         """Edit the league of a team.
         
@@ -142,16 +150,18 @@ class Admin(commands.Cog):
         league: TeamLeague
             The league to set the team to
         """
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             teams = await Team.search_by_name_or_tag_in_league(session, search_term)
             if not teams:
                 return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"No teams found with tag or name '{search_term}'."))
             team = teams[0]
             team.league = league.value
             await session.commit()
+            self.bot.team_strength.invalidate()
             await interaction.response.send_message(embed=EmbedGenerator.success_embed(title="Team League Edited", description=f"Successfully edited the league of team **{team.name} ({team.tag})** to **{league.value}**."))
     
     @app_commands.command()
+    @app_commands.autocomplete(search_term=team_tag_autocomplete)
     async def archive(self, interaction: discord.Interaction, search_term: str):
         """Archive a team and remove all associated channels/roles.
         
@@ -161,48 +171,110 @@ class Admin(commands.Cog):
             The tag or name of the team to archive
         """
         await interaction.response.defer()
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             teams = await Team.search_by_name_or_tag_in_league(session, search_term)
-            if not teams:
-                return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"Team with tag or name '{search_term}' does not exist."))
-            team = teams[0]
-            
-            # Confirm with the user
-            confirm_view = ConfirmView()
-            view_msg = await interaction.followup.send(
-                view=confirm_view,
-                embed=EmbedGenerator.default_embed(title="Archive Team", description=f"Are you sure you want to archive team **{team.name} ({team.tag})**? This action cannot be undone."),
-            )
-            
-            # Wait for user confirmation
-            await confirm_view.wait()
-            if confirm_view.value is None or not confirm_view.value:
-                return await interaction.followup.edit_message(view_msg.id, embed=EmbedGenerator.error_embed(title="Archive Team", description="Action cancelled by user."), view=None)
-            
-            category_channel = discord.utils.get(interaction.guild.categories, name=team.name)
-            if category_channel:
-                await category_channel.delete()
-                
-            text_channel = discord.utils.get(interaction.guild.text_channels, name=team.name)
-            if text_channel:
-                await text_channel.delete()
-            
-            voice_channel = discord.utils.get(interaction.guild.voice_channels, name=team.name)
-            if voice_channel:
-                await voice_channel.delete()
-            
-            players = await Player.fetch_all_from_team_id(session, team.id)
-            for player in players:
-                await player_leave_team(session, interaction, player, team, TransferType.TEAM_DISBAND)
-            
-            role = discord.utils.get(interaction.guild.roles, name=team.name)
-            if role:
-                await role.delete()
-                
-            await Team.archive(session, team.id)
-            await session.commit()
-            await interaction.followup.edit_message(view_msg.id, embed=EmbedGenerator.success_embed(title="Team Archived", description=f"Successfully archived team **{team.name} ({team.tag})**. All related channels have been deleted."),
-                                                     view=None)
+        if not teams:
+            return await interaction.followup.send(embed=EmbedGenerator.error_embed(title="Error", description=f"Team with tag or name '{search_term}' does not exist."))
+        team = teams[0]
+        # No connection is held while waiting for the confirmation
+        await unit_of_work(interaction).close()
+
+        # Confirm with the user
+        confirm_view = ConfirmView()
+        view_msg = await interaction.followup.send(
+            view=confirm_view,
+            embed=EmbedGenerator.default_embed(title="Archive Team", description=f"Are you sure you want to archive team **{team.name} ({team.tag})**? This action cannot be undone."),
+        )
+
+        # Wait for user confirmation
+        if await confirm_view.wait():
+            return await interaction.followup.edit_message(view_msg.id, embed=EmbedGenerator.error_embed(title="Archive Team", description="Action cancelled, no confirmation received in time."), view=None)
+        if not confirm_view.value:
+            return await interaction.followup.edit_message(view_msg.id, embed=EmbedGenerator.error_embed(title="Archive Team", description="Action cancelled by user."), view=None)
+
+        await interaction.followup.edit_message(view_msg.id, embed=EmbedGenerator.default_embed(title="Archiving Team", description=f"Archiving team **{team.name} ({team.tag})**..."), view=None)
+        async with unit_of_work(interaction) as session:
+            progress = await archive_team(session, interaction, team, view_msg.id)
+        self.bot.team_index.remove(team.id)
+        self.bot.team_strength.invalidate()
+        await interaction.followup.edit_message(view_msg.id, embed=progress.embed(), view=None)
+
+    @app_commands.command()
+    async def seeding(self, interaction: discord.Interaction, league: TeamLeague):
+        """View the seeding of a league by team strength.
+        
+        Parameters
+        ----------
+        league: TeamLeague
+            The league to seed
+        """
+        async with unit_of_work(interaction) as session:
+            seeds = await self.bot.team_strength.seeding(session, league.value)
+        if not seeds:
+            return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"No teams found in league **{league.value}**."))
+        lines = [f"**{seed}.** {self.bot.team_index.teams[team.team_id].name if team.team_id in self.bot.team_index.teams else team.team_id} - "
+                 f"Top 5: {approximate_rank(team.top_lp)}, Average: {approximate_rank(team.average_lp)}" for seed, team in enumerate(seeds, start=1)]
+        pages = [EmbedGenerator.default_embed(title=f"Seeding - {league.value}", description="\n".join(lines[i:i + 15])) for i in range(0, len(lines), 15)]
+        await ButtonPaginator(pages).start(interaction)
+
+    @app_commands.command()
+    async def reconcile(self, interaction: discord.Interaction, dry_run: bool = False, force: bool = False):
+        """Bring team roles, the registered role and nicknames in line with the database.
+
+        Parameters
+        ----------
+        dry_run: bool
+            Only count the members that would be updated
+        force: bool
+            Apply the changes even if more than RECONCILE_MAX_REMOVALS roles would be removed
+        """
+        cog = self.bot.get_cog("Reconciler")
+        if cog is None:
+            return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="The reconciler is not loaded."), ephemeral=True)
+        if cog.reconciler.running:
+            return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="The reconciler is already running."), ephemeral=True)
+        await interaction.response.defer()
+        report = await cog.reconciler.run(interaction.guild, dry_run, force)
+        description = str(report)
+        if report.missing_roles:
+            description += f"\n\nTeams without a role: {', '.join(sorted(report.missing_roles))}"
+        if report.aborted:
+            return await interaction.followup.send(embed=EmbedGenerator.warning_embed(title="Reconcile", description=description))
+        await interaction.followup.send(embed=EmbedGenerator.default_embed(title="Reconcile" + (" (dry run)" if dry_run else ""), description=description))
+
+    @app_commands.command()
+    async def riot_stats(self, interaction: discord.Interaction):
+        """View Riot API cache and rate limiter statistics.
+        """
+        client = self.bot.riot_client
+        cache_stats = client.cache.stats()
+        embed = EmbedGenerator.default_embed(title="Riot API Stats", description="")
+        flight_stats = client.single_flight.stats()
+        for endpoint in client.cache.ttls:
+            hits, misses = cache_stats["hits"].get(endpoint, 0), cache_stats["misses"].get(endpoint, 0)
+            hit_rate = f"{hits / (hits + misses):.0%}" if hits + misses else "n/a"
+            deduplicated = flight_stats["deduplicated"].get(endpoint, 0)
+            embed.add_field(name=endpoint, value=f"Hits: {hits}\nMisses: {misses}\nHit rate: {hit_rate}\nDeduplicated: {deduplicated}", inline=True)
+        embed.add_field(name="Cache", value=f"Entries: {cache_stats['entries']}\nSize: {cache_stats['bytes'] // 1024} KiB\nEvictions: {cache_stats['evictions']}", inline=False)
+        for pool in client.routing_pools:
+            embed.add_field(name=f"Rate limiter ({pool.routing})", value=f"Throttled calls: {pool.rate_limiter.throttled}\n429 responses: {pool.rate_limiter.rate_limited}", inline=True)
+        rank_refresh = self.bot.get_cog("RankRefresh")
+        if rank_refresh and rank_refresh.last_report:
+            report = rank_refresh.last_report
+            embed.add_field(name="Last rank sweep", value=f"Updated: {report['updated']}/{report['accounts']} ({report['failed']} failed)\n"
+                                                          f"Throughput: {report['accounts_per_minute']:.1f} accounts/min\n"
+                                                          f"Finished: {get_discord_unix_timestamp_long(report['finished_at'])}", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command()
+    async def db_stats(self, interaction: discord.Interaction):
+        """View the average number of database round trips per command.
+        """
+        stats = round_trip_stats
+        names = sorted(stats.commands, key=stats.average, reverse=True)
+        description = "\n".join(f"`{name}`: {stats.average(name):.1f} round trips ({stats.commands[name]} uses, {stats.deferred_flushes[name]} flushes deferred)" for name in names[:25])
+        await interaction.response.send_message(embed=EmbedGenerator.default_embed(title="Database Round Trips", description=description or "No commands used yet."), ephemeral=True)
+
     @app_commands.command()
     async def stop(self, interaction: discord.Interaction):
         """Stop the bot and unload all cogs.
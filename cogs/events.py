@@ -11,6 +11,8 @@ class Events(commands.Cog):
 
     @commands.Cog.listener()
     async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # Members who left cannot use commands, they are added back to the cache when they rejoin
+        self.bot.registered_players.discard(payload.user.id)
         async with AsyncSessionLocal() as session:
             player = await Player.fetch_from_discord_id(session, payload.user.id)
             if player:
@@ -21,6 +23,7 @@ class Events(commands.Cog):
                             team.captain_id = None
                     await player.remove_from_team(session, player.team_id)
                     await session.commit()
+                    self.bot.team_strength.invalidate()
                 except PlayerNotInTeam:
                     return
 
@@ -30,6 +33,7 @@ class Events(commands.Cog):
             player = await Player.fetch_from_discord_id(session, member.id)
             if not player:
                 return
+            self.bot.registered_players.add(player.discord_id)
             member = await self.bot.get_member(player.discord_id)
             if member:
                 await member.add_roles(discord.Object(role_id=REGISTERED_ROLE))
@@ -1,20 +1,20 @@
 from imghdr import tests
-import math
 
 from discord.ext import commands
 from discord import app_commands
 import discord
-from models import Account
 from models.invite import Invite
 from utils.embed_gen import EmbedGenerator
 from models.player import Player, PlayerDoesNotExist, PlayerAlreadyExists
 from models.team import Team
+from models.leaderboard import LeaderboardEntry
 from database import AsyncSessionLocal
+from utils.unit_of_work import unit_of_work
 from config import REGISTERED_ROLE, NICKNAME_CHARACTER_LIMIT, GUILD_ID
 from random import choice
-from utils.enums import LeagueRole, TeamLeague
+from utils.enums import LeagueRole, LeagueServer, TeamLeague
 from utils.util_funcs import get_discord_unix_timestamp_long, get_multi_opgg, get_opgg
-from utils.paginator import ButtonPaginator
+from utils.paginator import ButtonPaginator, PageSource
 from utils.views import HelpView
 
 class General(commands.Cog):
@@ -54,7 +54,7 @@ class General(commands.Cog):
                     )
                 )
         
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             if await Player.exists(session, interaction.user.id):
                return await interaction.response.send_message(
                     embed=EmbedGenerator.error_embed(
@@ -69,6 +69,7 @@ class General(commands.Cog):
                 nickname=interaction.user.nick if not nickname else nickname
             )
             await session.commit()
+        self.bot.registered_players.add(interaction.user.id)
         try:
             league_role = discord.utils.get(interaction.guild.roles, name=role.value)
             await interaction.user.add_roles(discord.Object(id=REGISTERED_ROLE), league_role)
@@ -93,7 +94,7 @@ class General(commands.Cog):
         nickname: str
             The nickname you want to change to.
         """
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             if len(nickname) > NICKNAME_CHARACTER_LIMIT:
                return await interaction.response.send_message(
                     embed=EmbedGenerator.error_embed(
@@ -136,8 +137,8 @@ class General(commands.Cog):
         """
         if not member:
             member = interaction.user
-        async with AsyncSessionLocal() as session:
-            player = await Player.fetch_from_discord_id(session, member.id)
+        async with unit_of_work(interaction) as session:
+            player = await Player.fetch_from_discord_id(session, member.id, profile="profile")
             if not player:
                 return await interaction.response.send_message(embed=EmbedGenerator.error_embed(
                     title=f"Profile - {member.name}",
@@ -145,8 +146,8 @@ class General(commands.Cog):
                 ))
                 
             # Fetch the player's team data
-            team = await Team.fetch_by_player_discord_id(session, player.discord_id)
-            captain = await Player.fetch_from_discord_id(session, team.captain_id) if team else None
+            team = player.team
+            captain = team.captain if team else None
             captain_member = interaction.guild.get_member(captain.discord_id) if captain else None
             team_name = team.name if team else "None"
             captain_mention = captain_member.mention if captain_member else "None"
@@ -161,7 +162,7 @@ class General(commands.Cog):
             else:
                 team_str = ""
 
-            account_info = await Account.fetch_all_from_player_id(session, member.id)
+            account_info = player.accounts
             accounts_east = list()
             accounts_west = list()
             for account in account_info:
@@ -193,6 +194,46 @@ class General(commands.Cog):
 
         await interaction.response.send_message(embed=embed)
     
+    @app_commands.command()
+    async def leaderboard(self, interaction: discord.Interaction, server: LeagueServer, role: LeagueRole = None, league: TeamLeague = None):
+        """View the ranked leaderboard of a server.
+        
+        Parameters:
+        server: LeagueServer
+            The server of the ladder.
+        role: Optional[LeagueRole]
+            Only rank players of this role.
+        league: Optional[TeamLeague]
+            Only rank players whose team plays in this league.
+        """
+        role = role.value if role else None
+        league = league.value if league else None
+        position = LeaderboardEntry.position_column(role, league)
+        async with unit_of_work(interaction) as session:
+            own_entry = await LeaderboardEntry.fetch_from_player_id(session, server.name, interaction.user.id)
+
+        # The leaderboard is rebuilt after every rank sweep, pages are read from its indexes as they are shown
+        async def fetch_entries(after, limit):
+            async with AsyncSessionLocal() as session:
+                return await LeaderboardEntry.fetch_page(session, server.name, role, league, after=after, limit=limit)
+
+        title = " ".join(filter(None, [f"Leaderboard - {server.name}", role, league]))
+
+        def render(entries, page_number):
+            lines = [f"**#{getattr(entry, position.key)}** <@{entry.player_id}> [{entry.summoner_name}#{entry.summoner_tag}]({get_opgg(server.name.lower(), f'{entry.summoner_name}#{entry.summoner_tag}')}) "
+                     f"- {entry.tier.capitalize()} {entry.rank} {entry.league_points} LP" for entry in entries]
+            embed = EmbedGenerator.default_embed(title=title, description="\n".join(lines))
+            footer = f"Updated {entries[0].refreshed_at:%d/%m/%Y %H:%M}"
+            if own_entry and (role is None or own_entry.role == role) and (league is None or own_entry.league == league):
+                footer = f"Your position: #{getattr(own_entry, position.key)} | {footer}"
+            embed.set_footer(text=footer)
+            return embed
+
+        source = PageSource.from_keyset(fetch_entries, render, key=lambda entry: getattr(entry, position.key), per_page=10)
+        if await source.get_page(0) is None:
+            return await interaction.response.send_message(embed=EmbedGenerator.default_embed(title=title, description="No ranked players found."))
+        await ButtonPaginator(source).start(interaction)
+
     @app_commands.command()
     async def help(self, interaction: discord.Interaction):
         """View the help menu.
@@ -203,7 +244,7 @@ class General(commands.Cog):
     async def invites(self, interaction: discord.Interaction):
         """View your active invites.
         """
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             player = await Player.fetch_from_discord_id(session, interaction.user.id)
             if not player:
                 await interaction.response.send_message(embed=EmbedGenerator.error_embed(
@@ -211,30 +252,27 @@ class General(commands.Cog):
                     description="You need to be registered to view your invites"))
                 return
             
-            active_invites = await Invite.fetch_active_invites_by_invitee(session, player.discord_id)
-            if not active_invites:
-                await interaction.response.send_message(embed=EmbedGenerator.error_embed(
-                    title="No Active Invites",
-                    description="You have no active invites"))
-                return
-            
-        per_page = 5
-        amount_of_pages = math.ceil(len(active_invites) / per_page)
-        pages = [EmbedGenerator.default_embed(
+        # Pages are fetched as they are shown, later pages by the paginator's button interactions
+        async def fetch_invites(after_id, limit):
+            async with AsyncSessionLocal() as session:
+                return await Invite.fetch_active_invites_by_invitee(session, player.discord_id, after_id=after_id, limit=limit)
+
+        source = PageSource.from_keyset(fetch_invites, lambda invites, page_number: EmbedGenerator.default_embed(
                 title=f"Active Invites - {player.nickname}", 
-                description="\n".join([f"- <@{invite.inviter_id}> (Expires: {get_discord_unix_timestamp_long(invite.expires_at)})" for invite in active_invites[i*per_page:(i+1)*per_page]])) for i in range(amount_of_pages)]
-        if amount_of_pages > 1:
-            paginator = ButtonPaginator(pages)
-            await paginator.start(interaction)
+                description="\n".join([f"- <@{invite.inviter_id}> (Expires: {get_discord_unix_timestamp_long(invite.expires_at)})" for invite in invites])), key=lambda invite: invite.id)
+        if await source.get_page(0) is None:
+            await interaction.response.send_message(embed=EmbedGenerator.error_embed(
+                title="No Active Invites",
+                description="You have no active invites"))
             return
-        await interaction.response.send_message(embed=pages[0])
+        await ButtonPaginator(source).start(interaction)
     
     # Some test commands for testing the bot
     @app_commands.command()
     async def team_check(self, interaction: discord.Interaction):
         """Check your team.
         """
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             team = await Team.fetch_by_player_discord_id(session, interaction.user.id)
         await interaction.response.send_message(
             embed=EmbedGenerator.default_embed(
@@ -0,0 +1,79 @@
+import asyncio
+import time
+import discord
+from discord.ext import commands, tasks
+from database import AsyncSessionLocal
+from models.invite import Invite
+from utils.embed_gen import EmbedGenerator
+from utils.util_funcs import get_discord_unix_timestamp_long
+from config import INVITE_CHANNEL, INVITE_EXPIRY_SWEEP_MINUTES, INVITE_EXPIRY_EDIT_BATCH_SIZE, INVITE_EXPIRY_EDIT_BATCH_SECONDS
+
+class InviteExpiry(commands.Cog):
+    """
+    Periodically expires invites past their expiry date and closes their approval requests
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.last_report = None
+
+    async def cog_load(self):
+        self.sweep.start()
+
+    async def cog_unload(self):
+        self.sweep.cancel()
+
+    @tasks.loop(minutes=INVITE_EXPIRY_SWEEP_MINUTES)
+    async def sweep(self):
+        # An exception escaping the loop body would stop the sweep until the bot restarts
+        try:
+            self.last_report = await self.expire_invites()
+        except Exception as e:
+            print(f"Invite expiry sweep failed, retrying with the next sweep: {str(e)}")
+            return
+        if self.last_report["expired"]:
+            print(f"Invite expiry: {self.last_report['expired']} invites expired, "
+                  f"{self.last_report['edited']}/{self.last_report['pending_approvals']} approval requests closed")
+
+    @sweep.before_loop
+    async def before_sweep(self):
+        await self.bot.wait_until_ready()
+
+    async def expire_invites(self) -> dict:
+        async with AsyncSessionLocal() as session:
+            expired = await Invite.expire_overdue(session)
+            await session.commit()
+
+        # Requests nobody answered still show their buttons, approved or denied ones were already edited
+        pending = [invite for invite in expired if invite.approved is None and invite.approval_message_id]
+        edited = await self.close_approval_requests(pending)
+        return {"expired": len(expired), "pending_approvals": len(pending), "edited": edited}
+
+    async def close_approval_requests(self, invites) -> int:
+        channel = self.bot.get_channel(INVITE_CHANNEL)
+        if channel is None or not invites:
+            return 0
+
+        async def close(invite) -> bool:
+            team = self.bot.team_index.teams.get(invite.team_id)
+            embed = EmbedGenerator.warning_embed(title="Invite Expired", description=f"Team: {team.name if team else invite.team_id}\nInviter: <@{invite.inviter_id}>\n"
+                                                                                      f"Invitee: <@{invite.invitee_id}>\nExpired: {get_discord_unix_timestamp_long(invite.expires_at)}")
+            try:
+                await channel.get_partial_message(invite.approval_message_id).edit(embed=embed, view=None)
+                return True
+            except discord.NotFound:
+                return False
+            except discord.HTTPException as e:
+                print(f"Could not close the approval request of invite {invite.id}: {str(e)}")
+                return False
+
+        # Edits to one channel share a rate limit, batches are spaced out instead of queueing in discord.py
+        edited = 0
+        for i in range(0, len(invites), INVITE_EXPIRY_EDIT_BATCH_SIZE):
+            batch_started = time.monotonic()
+            edited += sum(await asyncio.gather(*(close(invite) for invite in invites[i:i + INVITE_EXPIRY_EDIT_BATCH_SIZE])))
+            if i + INVITE_EXPIRY_EDIT_BATCH_SIZE < len(invites):
+                await asyncio.sleep(max(0, INVITE_EXPIRY_EDIT_BATCH_SECONDS - (time.monotonic() - batch_started)))
+        return edited
+
+async def setup(bot):
+    await bot.add_cog(InviteExpiry(bot))
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+from discord.ext import commands, tasks
+from database import AsyncSessionLocal
+from models.account import Account
+from models.rank_history import RankSnapshot
+from models.leaderboard import LeaderboardEntry
+from utils.enums import LeagueServer, LeagueTier
+from utils.rank_refresh import apply_account_update, fetch_account_updates, ingest_apex_ladders
+from utils.rate_limiter import background_calls, parse_rate_limit_header
+from config import RANK_SWEEP_INTERVAL_MINUTES, RANK_SWEEP_BATCH_SIZE, RANK_SWEEP_MIN_AGE_MINUTES, RANK_SWEEP_APEX_INGESTION, RIOT_BACKGROUND_SHARE, RIOT_DEFAULT_APP_RATE_LIMIT
+
+# The sweep's share of the sustained rate of a routing value, set by the longest window of its limit (100:120 rather than 20:1)
+SWEEP_CALLS_PER_SECOND = min(limit / window for limit, window in parse_rate_limit_header(RIOT_DEFAULT_APP_RATE_LIMIT)) * RIOT_BACKGROUND_SHARE
+
+def batch_duration(batch) -> float:
+    """Seconds a batch should take for the sweep to keep to SWEEP_CALLS_PER_SECOND on every routing value.
+
+    An account costs one account-v1 call on its regional routing value (shared by EUNE and EUW) and a
+    summoner and a league call on its platform.
+    """
+    calls = Counter()
+    for account in batch:
+        server = LeagueServer[account.server]
+        calls[server.routing] += 1
+        calls[server.value] += 2
+    return max(calls.values(), default=0) / SWEEP_CALLS_PER_SECOND
+
+def refresh_priority(account: Account, now: datetime) -> float:
+    """Higher means the account should be refreshed sooner.
+
+    Staleness is weighted by how likely the rank is to have moved: apex tiers gain and lose
+    LP quickly, and accounts close to a promotion or demotion change division often.
+    """
+    if account.last_updated is None:
+        return float("inf")
+    hours_stale = (now - account.last_updated).total_seconds() / 3600
+    if account.tier is None:
+        volatility = 0.5
+    elif LeagueTier[account.tier].value >= LeagueTier.MASTER.value:
+        volatility = 2.0
+    elif account.league_points is not None and (account.league_points >= 80 or account.league_points <= 20):
+        volatility = 1.5
+    else:
+        volatility = 1.0
+    return hours_stale * volatility
+
+class RankRefresh(commands.Cog):
+    """
+    Periodically refreshes the rank of every registered account
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.last_report = None
+
+    async def cog_load(self):
+        self.sweep.start()
+
+    async def cog_unload(self):
+        self.sweep.cancel()
+
+    @tasks.loop(minutes=RANK_SWEEP_INTERVAL_MINUTES)
+    async def sweep(self):
+        # Every Riot call of the sweep, including the ones of the tasks it starts, uses the background share of the limits
+        background_calls.set(True)
+        # An exception escaping the loop body would stop the sweep until the bot restarts
+        try:
+            self.last_report = await self.refresh_all()
+            self.bot.team_strength.invalidate()
+        except Exception as e:
+            print(f"Rank sweep failed, retrying with the next sweep: {str(e)}")
+            return
+        print(f"Rank sweep: {self.last_report['updated']}/{self.last_report['accounts']} accounts updated in "
+              f"{self.last_report['elapsed']:.0f}s ({self.last_report['accounts_per_minute']:.1f} accounts/min)")
+
+    @sweep.before_loop
+    async def before_sweep(self):
+        await self.bot.wait_until_ready()
+
+    async def refresh_all(self) -> dict:
+        started = time.monotonic()
+        now = datetime.now()
+        updated = failed = 0
+
+        async with AsyncSessionLocal() as session:
+            accounts = list()
+            for server in LeagueServer:
+                accounts.extend(await Account.fetch_all_from_server(session, server.name))
+        total = len(accounts)
+
+        # Sessions are only opened to write, no connection is held while waiting on the Riot API or the pacing
+        # Master+ accounts are matched against the apex ladders, a handful of calls for all of them
+        if RANK_SWEEP_APEX_INGESTION:
+            try:
+                ingested = await ingest_apex_ladders(self.bot.riot_client, accounts)
+                async with AsyncSessionLocal() as session:
+                    for account, changed in ingested:
+                        session.add(account)
+                        if changed:
+                            RankSnapshot.record(session, account)
+                    await session.commit()
+                updated += len(ingested)
+                ingested_ids = {account.id for account, _ in ingested}
+                accounts = [account for account in accounts if account.id not in ingested_ids]
+            except Exception as e:
+                print(f"Apex ladder ingestion failed, falling back to per-account refresh: {str(e)}")
+
+        # Most urgent first, accounts refreshed very recently (e.g. by /account update) are skipped
+        accounts = [account for account in accounts if account.last_updated is None or (now - account.last_updated).total_seconds() >= RANK_SWEEP_MIN_AGE_MINUTES * 60]
+        accounts.sort(key=lambda account: refresh_priority(account, now), reverse=True)
+
+        for i in range(0, len(accounts), RANK_SWEEP_BATCH_SIZE):
+            batch_started = time.monotonic()
+            batch = accounts[i:i + RANK_SWEEP_BATCH_SIZE]
+            results = [(account, data) for account, data, error in await fetch_account_updates(self.bot.riot_client, batch) if not error]
+            failed += len(batch) - len(results)
+            try:
+                async with AsyncSessionLocal() as session:
+                    for account, data in results:
+                        session.add(account)
+                        if apply_account_update(account, *data):
+                            RankSnapshot.record(session, account)
+                    await session.commit()
+                updated += len(results)
+            except Exception as e:
+                # A failed batch is retried by the next sweep, the remaining batches, downsampling and the leaderboard still run
+                failed += len(results)
+                print(f"Rank sweep could not save a batch of {len(batch)} accounts: {str(e)}")
+
+            # Spread the batches over the window instead of using the sweep's share in a burst at its start
+            await asyncio.sleep(max(0, batch_duration(batch) - (time.monotonic() - batch_started)))
+
+        try:
+            async with AsyncSessionLocal() as session:
+                await RankSnapshot.downsample(session)
+                await session.commit()
+        except Exception as e:
+            print(f"Rank history downsampling failed: {str(e)}")
+
+        # /leaderboard reads this table, rebuilding it once per sweep keeps the command's cost independent of the number of accounts
+        async with AsyncSessionLocal() as session:
+            leaderboard_entries = await LeaderboardEntry.refresh(session)
+            await session.commit()
+
+        elapsed = time.monotonic() - started
+        return {
+            "accounts": total,
+            "updated": updated,
+            "failed": failed,
+            "leaderboard_entries": leaderboard_entries,
+            "elapsed": elapsed,
+            "accounts_per_minute": updated / elapsed * 60 if elapsed else 0,
+            "finished_at": datetime.now(),
+        }
+
+async def setup(bot):
+    await bot.add_cog(RankRefresh(bot))
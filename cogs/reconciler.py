@@ -0,0 +1,28 @@
+from discord.ext import commands
+from utils.reconciler import RoleReconciler
+from config import GUILD_ID
+
+class Reconciler(commands.Cog):
+    """
+    Reconciles team roles, the registered role and nicknames with the database
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.reconciler = RoleReconciler(bot)
+        self.ran_at_startup = False
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # on_ready fires again after reconnects, the startup run catches up on what happened while offline once
+        if self.ran_at_startup:
+            return
+        self.ran_at_startup = True
+        guild = self.bot.get_guild(GUILD_ID)
+        if guild is None:
+            return
+        # Aborts without changing anything if the database looks wrong, see RoleReconciler.run
+        report = await self.reconciler.run(guild)
+        print(f"Reconciler: {report}")
+
+async def setup(bot):
+    await bot.add_cog(Reconciler(bot))
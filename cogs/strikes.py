@@ -0,0 +1,143 @@
+import discord
+from datetime import datetime, timedelta
+from discord.ext import commands, tasks
+from discord import app_commands
+from database import AsyncSessionLocal
+from models.player import Player
+from models.strike import Strike
+from models.team import Team
+from utils.embed_gen import EmbedGenerator
+from utils.paginator import ButtonPaginator, PageSource
+from utils.strike_engine import punishment_for
+from utils.team_index import team_tag_autocomplete
+from utils.unit_of_work import unit_of_work
+from utils.util_funcs import get_discord_unix_timestamp_long, send_dm
+from config import GUILD_ID, MODERATOR_ROLE, STRIKE_DURATION_DAYS, STRIKE_SUSPENSION_THRESHOLD, STRIKE_WHEEL_TICK_SECONDS
+
+class StrikeCog(commands.GroupCog, group_name="strike", description="Strike commands"):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        self.expire_strikes.start()
+
+    async def cog_unload(self):
+        self.expire_strikes.cancel()
+
+    # Interaction check to ensure user is registered
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id not in self.bot.registered_players:
+            await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="You are not registered, please use the /register command"), ephemeral=True)
+            return False
+        return True
+
+    @staticmethod
+    def is_moderator(interaction: discord.Interaction) -> bool:
+        return discord.utils.get(interaction.user.roles, id=MODERATOR_ROLE) is not None
+
+    @tasks.loop(seconds=STRIKE_WHEEL_TICK_SECONDS)
+    async def expire_strikes(self):
+        expired = self.bot.strikes.advance()
+        if expired:
+            print(f"Strikes: {len(expired)} strikes expired")
+
+    @app_commands.command(name="player", description="Strike a player")
+    async def player(self, interaction: discord.Interaction, member: discord.Member, reason: str, days: app_commands.Range[int, 1, 365] = STRIKE_DURATION_DAYS):
+        """Strike a player.
+
+        Parameters
+        ----------
+        member: discord.Member
+            The player to strike
+        reason: str
+            The reason of the strike
+        days: int
+            Number of days the strike stays active
+        """
+        if not self.is_moderator(interaction):
+            return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="This is a moderator only command."), ephemeral=True)
+        async with unit_of_work(interaction) as session:
+            if not await Player.fetch_from_discord_id(session, member.id):
+                return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Player is not registered."))
+            active_strikes = self.bot.strikes.player_strikes(member.id) + 1
+            punishment = punishment_for(active_strikes)
+            strike = await Strike.create_player_strike(session, interaction.user.id, member.id, reason, punishment, datetime.now() + timedelta(days=days))
+            await session.commit()
+        self.bot.strikes.add(strike)
+
+        description = f"**Reason: ** {reason}\n**Punishment: ** {punishment}\n**Active strikes: ** {active_strikes}\n**Expires: ** {get_discord_unix_timestamp_long(strike.expires_at)}"
+        await interaction.response.send_message(embed=EmbedGenerator.warning_embed(title=f"Strike - {member.display_name}", description=description))
+        await send_dm(interaction, member, EmbedGenerator.warning_embed(title="You received a strike", description=description))
+
+    @app_commands.command(name="team", description="Strike a team")
+    @app_commands.autocomplete(team_tag=team_tag_autocomplete)
+    async def team(self, interaction: discord.Interaction, team_tag: str, reason: str, days: app_commands.Range[int, 1, 365] = STRIKE_DURATION_DAYS):
+        """Strike a team.
+
+        Parameters
+        ----------
+        team_tag: str
+            The tag of the team to strike
+        reason: str
+            The reason of the strike
+        days: int
+            Number of days the strike stays active
+        """
+        if not self.is_moderator(interaction):
+            return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="This is a moderator only command."), ephemeral=True)
+        async with unit_of_work(interaction) as session:
+            team = await Team.fetch_from_tag(session, team_tag)
+            if not team or not team.active:
+                return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"Team with tag '{team_tag}' does not exist."))
+            active_strikes = self.bot.strikes.team_strikes(team.id) + 1
+            punishment = punishment_for(active_strikes)
+            strike = await Strike.create_team_strike(session, interaction.user.id, team.id, reason, punishment, datetime.now() + timedelta(days=days))
+            await session.commit()
+        self.bot.strikes.add(strike)
+
+        description = f"**Reason: ** {reason}\n**Punishment: ** {punishment}\n**Active strikes: ** {active_strikes}\n**Expires: ** {get_discord_unix_timestamp_long(strike.expires_at)}"
+        await interaction.response.send_message(embed=EmbedGenerator.warning_embed(title=f"Strike - {team.name}", description=description))
+
+    @app_commands.command(name="list", description="List the strikes of a player or a team")
+    @app_commands.autocomplete(team_tag=team_tag_autocomplete)
+    async def list(self, interaction: discord.Interaction, member: discord.Member = None, team_tag: str = None):
+        """List the strikes of a player or a team.
+
+        Parameters
+        ----------
+        member: discord.Member
+            The player to list the strikes of, defaults to you
+        team_tag: str
+            The tag of the team to list the strikes of instead
+        """
+        if not self.is_moderator(interaction):
+            return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="This is a moderator only command."), ephemeral=True)
+        if team_tag:
+            async with unit_of_work(interaction) as session:
+                team = await Team.fetch_from_tag(session, team_tag)
+            if not team:
+                return await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description=f"Team with tag '{team_tag}' does not exist."))
+            title, filters, active_strikes = f"Strikes - {team.name}", {"issued_for_team_id": team.id}, self.bot.strikes.team_strikes(team.id)
+        else:
+            member = member or interaction.user
+            title, filters, active_strikes = f"Strikes - {member.display_name}", {"issued_for_id": member.id}, self.bot.strikes.player_strikes(member.id)
+
+        async def fetch_strikes(before_id, limit):
+            async with AsyncSessionLocal() as session:
+                return await Strike.fetch_page(session, before_id=before_id, limit=limit, **filters)
+
+        now = datetime.now()
+        def render(strikes, page_number):
+            lines = [f"- {'🔴' if strike.expires_at > now else '⚪'} **{strike.punishment}**: {strike.reason} "
+                     f"(by <@{strike.issued_by_id}>, expires {get_discord_unix_timestamp_long(strike.expires_at)})" for strike in strikes]
+            embed = EmbedGenerator.default_embed(title=title, description="\n".join(lines))
+            embed.set_footer(text=f"Active strikes: {active_strikes}/{STRIKE_SUSPENSION_THRESHOLD}" + (" (suspended)" if active_strikes >= STRIKE_SUSPENSION_THRESHOLD else ""))
+            return embed
+
+        source = PageSource.from_keyset(fetch_strikes, render, key=lambda strike: strike.id)
+        if await source.get_page(0) is None:
+            return await interaction.response.send_message(embed=EmbedGenerator.default_embed(title=title, description="No strikes found."))
+        await ButtonPaginator(source).start(interaction)
+
+async def setup(bot):
+    await bot.add_cog(StrikeCog(bot), guilds=[discord.Object(id=GUILD_ID)])
@@ -1,17 +1,34 @@
-import math
 import discord
 from discord.ext import commands
 from discord import app_commands
 from models.team import Team
 from models.player import Player
 from models.invite import Invite
+from models.transfer import Transfer
 from database import AsyncSessionLocal
+from utils.unit_of_work import unit_of_work
 from utils.embed_gen import EmbedGenerator
+from utils.enums import TransferType
 from datetime import datetime, timedelta
 from config import APPROVAL_REQUIRED, GUILD_ID, INVITE_CHANNEL
-from utils.paginator import ButtonPaginator
+from utils.paginator import ButtonPaginator, PageSource
 from utils.util_funcs import get_discord_unix_timestamp_long, player_join_team, player_leave_team, send_dm
 from utils.views import InviteApprovalView
+from utils.team_index import team_name_autocomplete, team_tag_autocomplete
+from utils.team_strength import approximate_rank
+
+TRANSFER_ICONS = {
+    TransferType.PLAYER_JOIN.value: "🟢",
+    TransferType.TEAM_CREATE.value: "🟢",
+    TransferType.PLAYER_LEAVE.value: "🔴",
+    TransferType.TEAM_DISBAND.value: "🔴",
+}
+TRANSFER_VERBS = {
+    TransferType.PLAYER_JOIN.value: "joined",
+    TransferType.TEAM_CREATE.value: "created the team",
+    TransferType.PLAYER_LEAVE.value: "left",
+    TransferType.TEAM_DISBAND.value: "left because the team was disbanded",
+}
 
 class TeamCog(commands.GroupCog, group_name="team", description="Team management commands"):
     def __init__(self, bot):
@@ -20,10 +37,9 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
     
     # Interaction check to ensure user is registered
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        async with AsyncSessionLocal() as session:
-            if not await Player.exists(session, interaction.user.id):
-                await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="You must be registered to use this command."))
-                return False
+        if interaction.user.id not in self.bot.registered_players:
+            await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="You must be registered to use this command."))
+            return False
         return True
 
     @app_commands.command()
@@ -34,7 +50,15 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
         member: discord.Member
             The player you want to invite to your team.
         """
-        async with AsyncSessionLocal() as session:
+        # Suspensions are checked against the in-memory strike counters, before any query
+        if self.bot.strikes.is_player_suspended(interaction.user.id):
+            await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="You are suspended and cannot invite players."))
+            return
+        if self.bot.strikes.is_player_suspended(member.id):
+            await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="This player is suspended and cannot be invited."))
+            return
+        
+        async with unit_of_work(interaction) as session:
             inviter = await Player.fetch_from_discord_id(session, interaction.user.id)
             invitee = await Player.fetch_from_discord_id(session, member.id)
             team = await Team.fetch_from_id(session, inviter.team_id)
@@ -54,6 +78,10 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
                 await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Only the team captain can invite players."))
                 return
             
+            if self.bot.strikes.is_team_suspended(team.id):
+                await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Your team is suspended and cannot invite players."))
+                return
+            
             if await Invite.fetch_active_invite_by_team_id_and_invitee(session, inviter.team_id, invitee.discord_id):
                 await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="This player has already been invited to this team."))
                 return
@@ -71,7 +99,10 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
 
             approval_embed = EmbedGenerator.default_embed(title="Invite Approval", description=f"Team: {team.name}\nInviter: {interaction.user.mention}\nInvitee: {member.mention}\nExpires: {expires_at.strftime('%Y-%m-%d %H:%M:%S')}")
             view = InviteApprovalView(invite.id)
-            await mod_invite_channel.send(embed=approval_embed, view=view)
+            approval_message = await mod_invite_channel.send(embed=approval_embed, view=view)
+            # Kept so the invite expiry sweeper can close the request if nobody answers it
+            invite.approval_message_id = approval_message.id
+            await session.commit()
         else:
             await Invite.approve_status(session, invite.id, True)
             await session.commit()
@@ -86,7 +117,7 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
             
     @app_commands.command(name="invites", description="List all pending invites for your team")
     async def invites(self, interaction: discord.Interaction):
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             player = await Player.fetch_from_discord_id(session, interaction.user.id)
             
             if not player.team_id:
@@ -98,26 +129,27 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
                 await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Only the team captain can view invites."))
                 return
             
-            active_invites = await Invite.fetch_active_invites_by_inviter(session, player.discord_id)
-            
-            if not active_invites:
-                await interaction.response.send_message(embed=EmbedGenerator.default_embed(title="Invites", description="No active invites found."))
-                return
-            
-            per_page = 5
-            amount_of_pages = math.ceil(len(active_invites) / per_page)
-            pages = [EmbedGenerator.default_embed(
-                title=f"Invite list - {team.name}", 
-                description="\n".join([f"- <@{invite.invitee_id}> (Expires: {get_discord_unix_timestamp_long(invite.expires_at)})" for invite in active_invites[i*per_page:(i+1)*per_page]])) for i in range(amount_of_pages)]
-            if amount_of_pages > 1:
-                paginator = ButtonPaginator(pages)
-                await paginator.start(interaction)
-                return
-            await interaction.response.send_message(embed=pages[0])
+        # Pages are fetched as they are shown, later pages by the paginator's button interactions
+        async def fetch_invites(after_id, limit):
+            async with AsyncSessionLocal() as session:
+                return await Invite.fetch_active_invites_by_inviter(session, player.discord_id, after_id=after_id, limit=limit)
+
+        source = PageSource.from_keyset(fetch_invites, lambda invites, page_number: EmbedGenerator.default_embed(
+            title=f"Invite list - {team.name}", 
+            description="\n".join([f"- <@{invite.invitee_id}> (Expires: {get_discord_unix_timestamp_long(invite.expires_at)})" for invite in invites])), key=lambda invite: invite.id)
+        if await source.get_page(0) is None:
+            await interaction.response.send_message(embed=EmbedGenerator.default_embed(title="Invites", description="No active invites found."))
+            return
+        await ButtonPaginator(source).start(interaction)
 
     @app_commands.command(name="accept", description="Accept a team invitation")
+    @app_commands.autocomplete(team_tag=team_tag_autocomplete)
     async def accept(self, interaction: discord.Interaction, team_tag: str):
-        async with AsyncSessionLocal() as session:
+        if self.bot.strikes.is_player_suspended(interaction.user.id):
+            await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="You are suspended and cannot join a team."))
+            return
+        
+        async with unit_of_work(interaction) as session:
             player = await Player.fetch_from_discord_id(session, interaction.user.id)
             
             if player.team_id:
@@ -129,11 +161,17 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
                 await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Team not found."))
                 return
             
+            if self.bot.strikes.is_team_suspended(team.id):
+                await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="This team is suspended and cannot take new players."))
+                return
+            
             invite = await Invite.fetch_active_invite_by_team_tag_and_invitee(session, team.tag, player.discord_id)
             if not invite:
                 await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="No valid invite found for this team."))
                 return
                     
+            # Accepted in the same transaction as the join, a failed join leaves the invite active
+            await Invite.accept_invite(session, invite.id)
             success, message = await player_join_team(session, interaction, player, team)
         
             if not success:
@@ -141,9 +179,6 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
                 await interaction.response.send_message(embed=embed)
                 return
             
-            await Invite.accept_invite(session, invite.id)
-            await session.commit()
-            
             if "Database updated" in message:
                 embed = EmbedGenerator.warning_embed(title="Invite Partially Accepted", description=f"You have joined **{team.name}** in the database, but: {message}")
             else:
@@ -153,7 +188,7 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
 
     @app_commands.command(name="kick", description="Kick a player from your team")
     async def kick(self, interaction: discord.Interaction, member: discord.Member):
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             kicker = await Player.fetch_from_discord_id(session, interaction.user.id)
             kicked = await Player.fetch_from_discord_id(session, member.id)
             
@@ -193,8 +228,9 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
             await interaction.response.send_message(embed=embed)
             
     @app_commands.command(name="decline", description="Decline a team invitation")
+    @app_commands.autocomplete(team_tag=team_tag_autocomplete)
     async def decline(self, interaction: discord.Interaction, team_tag: str):
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             player = await Player.fetch_from_discord_id(session, interaction.user.id)
             
             team = await Team.fetch_from_tag(session, team_tag)
@@ -209,7 +245,7 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
             
             # Notify inviter that invite has been declined
             denial_embed = EmbedGenerator.default_embed(title="Invite Declined", description=f"Your invitation of **{player.nickname}** to **{team.name}** has been declined by {player.nickname}.")
-            await send_dm(interaction, invite.inviter, denial_embed)
+            await send_dm(interaction, interaction.guild.get_member(invite.inviter_id), denial_embed)
             
             await Invite.decline_invite(session, invite.id)
             await session.commit()
@@ -217,7 +253,7 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
 
     @app_commands.command(name="leave", description="Leave your current team")
     async def leave(self, interaction: discord.Interaction):
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             player = await Player.fetch_from_discord_id(session, interaction.user.id)
             
             if not player.team_id:
@@ -246,7 +282,7 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
             
     @app_commands.command(name="transfer", description="Transfer team ownership to another player")
     async def transferownership(self, interaction: discord.Interaction, new_owner: discord.Member):
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             current_captain = await Player.fetch_from_discord_id(session, interaction.user.id)
             new_captain = await Player.fetch_from_discord_id(session, new_owner.id)
             
@@ -268,7 +304,7 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
                 return
             
             team.captain_id = new_captain.discord_id
-            await session.flush()
+            await session.commit()
             
             await interaction.response.send_message(embed=EmbedGenerator.success_embed(title="Ownership Transferred", description=f"Transferred team ownership to {new_owner.mention}."))
 
@@ -277,17 +313,93 @@ class TeamCog(commands.GroupCog, group_name="team", description="Team management
         # Implementation for announce command
         await interaction.response.send_message(f"Announcement sent to your team: {message}")
 
+    @app_commands.command(name="history", description="View the transfer history of a team")
+    @app_commands.autocomplete(team_tag=team_tag_autocomplete)
+    async def history(self, interaction: discord.Interaction, team_tag: str = None, days: app_commands.Range[int, 1, 3650] = None):
+        """View the transfer history of a team.
+
+        Parameters
+        ----------
+        team_tag: str
+            The tag of the team, defaults to your team
+        days: int
+            Only show transfers from the last number of days
+        """
+        async with unit_of_work(interaction) as session:
+            if team_tag:
+                team = await Team.fetch_from_tag(session, team_tag)
+            else:
+                player = await Player.fetch_from_discord_id(session, interaction.user.id)
+                team = await Team.fetch_from_id(session, player.team_id) if player.team_id else None
+            if not team:
+                await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Team not found." if team_tag else "You are not in a team, pass a team tag."))
+                return
+
+        from_date = datetime.now() - timedelta(days=days) if days else None
+
+        async def fetch_transfers(before, limit):
+            async with AsyncSessionLocal() as session:
+                return await Transfer.fetch_history(session, team_id=team.id, before=before, from_date=from_date, limit=limit)
+
+        def render(transfers, page_number):
+            lines = [f"{TRANSFER_ICONS[transfer.transfer_type]} <@{transfer.player_id}> {TRANSFER_VERBS[transfer.transfer_type]} "
+                     f"{get_discord_unix_timestamp_long(transfer.transfer_date)}" for transfer in transfers]
+            return EmbedGenerator.default_embed(title=f"Transfer history - {team.name}", description="\n".join(lines))
+
+        source = PageSource.from_keyset(fetch_transfers, render, key=lambda transfer: (transfer.transfer_date, transfer.id), per_page=10)
+        if await source.get_page(0) is None:
+            await interaction.response.send_message(embed=EmbedGenerator.default_embed(title="Transfer history", description=f"No transfers found for **{team.name}**."))
+            return
+        await ButtonPaginator(source).start(interaction)
+
+    @app_commands.command(name="stats", description="View the rank statistics of a team")
+    @app_commands.autocomplete(team_tag=team_tag_autocomplete)
+    async def stats(self, interaction: discord.Interaction, team_tag: str = None):
+        """View the rank statistics of a team.
+
+        Parameters
+        ----------
+        team_tag: str
+            The tag of the team, defaults to your team
+        """
+        async with unit_of_work(interaction) as session:
+            if team_tag:
+                team = await Team.fetch_from_tag(session, team_tag)
+            else:
+                team = await Team.fetch_by_player_discord_id(session, interaction.user.id)
+            if not team or not team.active:
+                await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Team not found." if team_tag else "You are not in a team, pass a team tag."))
+                return
+            strength = await self.bot.team_strength.fetch(session, team.id)
+            seeds = await self.bot.team_strength.seeding(session, team.league) if team.league else []
+
+        if not strength:
+            await interaction.response.send_message(embed=EmbedGenerator.default_embed(title=f"Team stats - {team.name}", description="This team has no players."))
+            return
+        seed = next((position for position, seeded in enumerate(seeds, start=1) if seeded.team_id == team.id), None)
+        embed = EmbedGenerator.default_embed(title=f"Team stats - {team.name} [{team.tag}]", description=
+            f"**Average: ** {approximate_rank(strength.average_lp)}\n"
+            f"**Median: ** {approximate_rank(strength.median_lp)}\n"
+            f"**Top 5 average: ** {approximate_rank(strength.top_lp)}\n"
+            f"**Best player: ** {approximate_rank(strength.best_lp)}\n"
+            f"**Ranked players: ** {strength.ranked_players}/{strength.players}\n"
+            f"**Roles covered: ** {', '.join(strength.roles_covered) or 'None'}\n"
+            f"**Roles missing: ** {', '.join(strength.roles_missing) or 'None'}"
+            + (f"\n**Seed: ** {seed}/{len(seeds)} in {team.league}" if seed else ""))
+        embed.set_footer(text=f"Computed {self.bot.team_strength.computed_at:%d/%m/%Y %H:%M}, updated on every rank or roster change")
+        await interaction.response.send_message(embed=embed)
+
     @app_commands.command(name="list", description="List all teams or members of a specific team")
+    @app_commands.autocomplete(team_name=team_name_autocomplete)
     async def list(self, interaction: discord.Interaction, team_name: str = None):
-        async with AsyncSessionLocal() as session:
+        async with unit_of_work(interaction) as session:
             if team_name:
-                team = await Team.fetch_from_name(session, team_name)
+                team = await Team.fetch_from_name(session, team_name, profile="roster")
                 if not team:
                     await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="Team not found."))
                     return
                 
-                members = await Player.fetch_all_from_team_id(session, team.id)
-                member_list = "\n".join([f"<@{member.discord_id}> ({member.role})" for member in members])
+                member_list = "\n".join([f"<@{member.discord_id}> ({member.role})" for member in team.players])
                 await interaction.response.send_message(embed=EmbedGenerator.default_embed(title=f"Members of {team_name}", description=member_list))
             else:
                 teams = await Team.fetch_all(session)
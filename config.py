@@ -16,3 +16,48 @@ APPROVAL_REQUIRED = True
 NICKNAME_CHARACTER_LIMIT = 24
 TAG_CHARACTER_LIMIT = 4
 BIO_CHARACTER_LIMIT = 100
+
+RIOT_CONNECTION_POOL_SIZE = 20
+RIOT_KEEPALIVE_TIMEOUT = 60
+RIOT_DEFAULT_APP_RATE_LIMIT = "20:1,100:120"
+RIOT_MAX_RATE_LIMIT_RETRIES = 5
+RIOT_MAX_SERVER_ERROR_RETRIES = 3  # 5xx and connection errors, retried after 2, 4, 8s
+RIOT_ROUTING_CONCURRENCY = 10  # Requests in flight per routing value (europe, eun1, euw1, ...)
+RIOT_BACKGROUND_SHARE = 0.5  # Share of every rate limit window background calls (the rank sweep) may use, the rest is kept for commands
+# Seconds each Riot endpoint stays cached, 0 disables caching for it
+RIOT_CACHE_TTLS = {
+    "account": 3600,
+    "summoner": 600,
+    "league_entries": 120,
+}
+RIOT_CACHE_MAX_BYTES = 4 * 1024 * 1024
+RANK_REFRESH_CONCURRENCY = 5  # Accounts refreshed at once per platform
+RANK_SWEEP_INTERVAL_MINUTES = 60
+RANK_SWEEP_MIN_AGE_MINUTES = 30
+RANK_SWEEP_BATCH_SIZE = 20
+RANK_SWEEP_APEX_INGESTION = True
+VERIFICATION_DEADLINE_SECONDS = 600  # Must stay below the 15 minute interaction token lifetime
+VERIFICATION_INITIAL_DELAY = 5
+VERIFICATION_MAX_DELAY = 60
+RANK_HISTORY_FULL_RESOLUTION_DAYS = 7
+RANK_HISTORY_SEASON_DAYS = 120  # Older snapshots are kept weekly
+INVITE_EXPIRY_SWEEP_MINUTES = 10
+INVITE_EXPIRY_EDIT_BATCH_SIZE = 5  # Approval messages edited at once, Discord allows about 5 edits per 5 seconds per channel
+INVITE_EXPIRY_EDIT_BATCH_SECONDS = 5
+STRIKE_DURATION_DAYS = 30
+# Punishment by the number of active strikes including the new one, the last entry applies to any higher count
+STRIKE_ESCALATION = {
+    1: "Warning",
+    2: "Final warning",
+    3: "Suspension",
+}
+STRIKE_SUSPENSION_THRESHOLD = 3  # Active strikes at which a player or team can no longer invite, be invited or join
+STRIKE_WHEEL_TICK_SECONDS = 60
+TRANSFER_JOURNAL_FLUSH_SECONDS = 5  # Longest a transfer waits before it is written and posted
+TRANSFER_JOURNAL_MAX_EVENTS = 50  # Buffered transfers that trigger an early flush
+TRANSFER_JOURNAL_MAX_ATTEMPTS = 5  # Failed writes after which a transfer is dropped
+ARCHIVE_CONCURRENCY = 5  # Discord requests in flight while archiving a team
+ARCHIVE_PROGRESS_SECONDS = 2  # Interval of the archive progress updates
+RECONCILE_RATE_LIMIT = "10:10"  # Member edits per seconds made by the role and nickname reconciler
+RECONCILE_CONCURRENCY = 3
+RECONCILE_MAX_REMOVALS = 25  # Runs that would remove more roles are aborted unless forced, guards against an empty or wrong database
@@ -3,6 +3,7 @@ from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 from models.base import Base
+from migrations import run_migrations
 
 # Load environment variables
 load_dotenv(override=True)
@@ -28,8 +29,7 @@ engine = create_async_engine(
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await run_migrations(engine)
 
 async def get_db():
     async with AsyncSessionLocal() as session:
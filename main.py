@@ -1,6 +1,6 @@
 import asyncio
 from bot import setup_bot
-from database import engine, Base
+from database import init_db
 from dotenv import load_dotenv
 import os
 
@@ -8,8 +8,7 @@ load_dotenv()
 
 async def main():
     bot = await setup_bot()
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await init_db()
     async with bot:
         await bot.start(os.getenv('BOT_TOKEN'))
 
@@ -0,0 +1,69 @@
+"""Versioned schema migrations.
+
+Each module in this package named `v<version>_<description>.py` defines VERSION, an integer
+greater than the previous migration's, and `async def upgrade(conn)`. Applied versions are
+recorded in schema_version, pending ones are applied in order, each in its own transaction,
+by run_migrations (called from init_db at startup) or `python -m migrations`.
+
+Version 1 creates the tables with Base.metadata.create_all, which is what the bot did before
+migrations existed, so databases created that way are upgraded from there. Later migrations
+use IF NOT EXISTS as a fresh database already gets them from the models in version 1.
+"""
+import importlib
+import logging
+import pkgutil
+from types import ModuleType
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+# Key of the Postgres advisory lock held while migrating, so two bot processes never migrate at once
+MIGRATION_LOCK_KEY = 4815162342
+
+def discover() -> List[ModuleType]:
+    migrations = [importlib.import_module(f"{__name__}.{info.name}") for info in pkgutil.iter_modules(__path__) if info.name.startswith("v")]
+    migrations.sort(key=lambda migration: migration.VERSION)
+    versions = [migration.VERSION for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+async def ensure_version_table(conn: AsyncConnection):
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "description TEXT NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL DEFAULT now())"
+    ))
+
+async def current_version(conn: AsyncConnection) -> int:
+    result = await conn.execute(text("SELECT coalesce(max(version), 0) FROM schema_version"))
+    return result.scalar_one()
+
+def describe(migration: ModuleType) -> str:
+    return (migration.__doc__ or migration.__name__.rsplit(".", 1)[-1]).strip().splitlines()[0]
+
+async def run_migrations(engine: AsyncEngine, target: Optional[int] = None) -> List[int]:
+    """Apply every pending migration up to `target` (all of them by default), returns the applied versions."""
+    applied = list()
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            await ensure_version_table(conn)
+            await conn.commit()
+            version = await current_version(conn)
+            await conn.commit()
+            for migration in discover():
+                if migration.VERSION <= version or (target is not None and migration.VERSION > target):
+                    continue
+                async with conn.begin():
+                    await migration.upgrade(conn)
+                    await conn.execute(text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                                       {"version": migration.VERSION, "description": describe(migration)})
+                logging.info(f"Applied migration {migration.VERSION}: {describe(migration)}")
+                applied.append(migration.VERSION)
+        finally:
+            await conn.rollback()
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            await conn.commit()
+    return applied
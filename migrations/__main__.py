@@ -0,0 +1,25 @@
+"""Usage: python -m migrations [status | upgrade [version]]"""
+import asyncio
+import sys
+from database import engine
+from migrations import current_version, describe, discover, ensure_version_table, run_migrations
+
+async def main(args):
+    command = args[0] if args else "upgrade"
+    try:
+        if command == "status":
+            async with engine.begin() as conn:
+                await ensure_version_table(conn)
+                version = await current_version(conn)
+            for migration in discover():
+                print(f"{'applied' if migration.VERSION <= version else 'pending'}  {migration.VERSION:04d}  {describe(migration)}")
+        elif command == "upgrade":
+            applied = await run_migrations(engine, int(args[1]) if len(args) > 1 else None)
+            print(f"Applied migrations: {applied}" if applied else "Database is up to date")
+        else:
+            raise SystemExit(__doc__)
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
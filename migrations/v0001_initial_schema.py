@@ -0,0 +1,9 @@
+"""Create the tables"""
+from sqlalchemy.ext.asyncio import AsyncConnection
+from models.base import Base
+import models  # noqa: F401, registers every model on Base.metadata
+
+VERSION = 1
+
+async def upgrade(conn: AsyncConnection):
+    await conn.run_sync(Base.metadata.create_all)
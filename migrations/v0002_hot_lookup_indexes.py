@@ -0,0 +1,23 @@
+"""Index the columns the fetchers filter on"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+VERSION = 2
+
+STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_players_team_id ON players_table (team_id)",
+    "CREATE INDEX IF NOT EXISTS ix_accounts_player_id ON accounts_table (player_id)",
+    # Only active invites are looked up by player
+    "CREATE INDEX IF NOT EXISTS ix_invites_invitee_active ON invites_table (invitee_id) WHERE active = true",
+    "CREATE INDEX IF NOT EXISTS ix_invites_inviter_active ON invites_table (inviter_id) WHERE active = true",
+    "CREATE INDEX IF NOT EXISTS ix_transfers_team_date ON transfers_table (team_id, transfer_date)",
+    "CREATE INDEX IF NOT EXISTS ix_strikes_issued_for_expires ON strikes_table (issued_for_id, expires_at)",
+    "CREATE INDEX IF NOT EXISTS ix_teams_tag_active ON teams_table (tag, active)",
+    # Fails if two active teams already share a name or tag, archive or rename one of them first
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_teams_name_active ON teams_table (name) WHERE active = true",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_teams_tag_active ON teams_table (tag) WHERE active = true",
+]
+
+async def upgrade(conn: AsyncConnection):
+    for statement in STATEMENTS:
+        await conn.execute(text(statement))
@@ -0,0 +1,16 @@
+"""Trigram indexes for team search"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+VERSION = 3
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # Serve both ILIKE '%term%' and the similarity operator, archived teams are never searched
+    "CREATE INDEX IF NOT EXISTS ix_teams_name_trgm ON teams_table USING gin (name gin_trgm_ops) WHERE active = true",
+    "CREATE INDEX IF NOT EXISTS ix_teams_tag_trgm ON teams_table USING gin (tag gin_trgm_ops) WHERE active = true",
+]
+
+async def upgrade(conn: AsyncConnection):
+    for statement in STATEMENTS:
+        await conn.execute(text(statement))
@@ -0,0 +1,16 @@
+"""Index transfer history by team and by player in keyset order"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+VERSION = 4
+
+STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_transfers_team_history ON transfers_table (team_id, transfer_date, id)",
+    "CREATE INDEX IF NOT EXISTS ix_transfers_player_history ON transfers_table (player_id, transfer_date, id)",
+    # Covered by ix_transfers_team_history
+    "DROP INDEX IF EXISTS ix_transfers_team_date",
+]
+
+async def upgrade(conn: AsyncConnection):
+    for statement in STATEMENTS:
+        await conn.execute(text(statement))
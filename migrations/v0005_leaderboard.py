@@ -0,0 +1,13 @@
+"""Index accounts by numerical LP and add the precomputed leaderboard"""
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateIndex
+from models.account import Account
+from models.leaderboard import LeaderboardEntry
+
+VERSION = 5
+
+async def upgrade(conn: AsyncConnection):
+    # The expression is compiled from Account.numerical_lp so queries using it match the index
+    index = next(index for index in Account.__table__.indexes if index.name == "ix_accounts_server_numerical_lp")
+    await conn.execute(CreateIndex(index, if_not_exists=True))
+    await conn.run_sync(lambda sync_conn: LeaderboardEntry.__table__.create(sync_conn, checkfirst=True))
@@ -0,0 +1,14 @@
+"""Record invite approval messages and index active invites by expiry"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+VERSION = 6
+
+STATEMENTS = [
+    "ALTER TABLE invites_table ADD COLUMN IF NOT EXISTS approval_message_id BIGINT",
+    "CREATE INDEX IF NOT EXISTS ix_invites_expires_active ON invites_table (expires_at) WHERE active",
+]
+
+async def upgrade(conn: AsyncConnection):
+    for statement in STATEMENTS:
+        await conn.execute(text(statement))
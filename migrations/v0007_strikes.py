@@ -0,0 +1,17 @@
+"""Widen strike player ids to Discord ids, record issue dates and index team strikes"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+VERSION = 7
+
+STATEMENTS = [
+    # Discord ids do not fit the INTEGER columns the table was created with
+    "ALTER TABLE strikes_table ALTER COLUMN issued_by_id TYPE BIGINT",
+    "ALTER TABLE strikes_table ALTER COLUMN issued_for_id TYPE BIGINT",
+    "ALTER TABLE strikes_table ADD COLUMN IF NOT EXISTS issued_at TIMESTAMP DEFAULT now()",
+    "CREATE INDEX IF NOT EXISTS ix_strikes_team_expires ON strikes_table (issued_for_team_id, expires_at)",
+]
+
+async def upgrade(conn: AsyncConnection):
+    for statement in STATEMENTS:
+        await conn.execute(text(statement))
@@ -4,6 +4,8 @@ from models.team import Team
 from models.invite import Invite
 from models.transfer import Transfer
 from models.strike import Strike
+from models.rank_history import RankSnapshot
+from models.leaderboard import LeaderboardEntry
 
 from sqlalchemy.orm import configure_mappers
 configure_mappers()
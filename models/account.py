@@ -1,12 +1,12 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.sql import func, select
+from sqlalchemy.sql import func, select, case, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
 from utils.enums import LeagueRank, LeagueTier
-from .base import Base
+from .base import Base, LAZY
 from datetime import datetime
 
 class AccountAlreadyExists(Exception):
@@ -42,7 +42,11 @@ class Account(Base):
     
     # Misc info
     added_at = Column(DateTime, server_default=func.now())
-    player = relationship("Player", back_populates="accounts")
+    player = relationship("Player", back_populates="accounts", lazy=LAZY)
+
+    __table_args__ = (
+        Index("ix_accounts_player_id", "player_id"),
+    )
 
 
     def __str__(self):
@@ -50,7 +54,17 @@ class Account(Base):
     
     @hybrid_property
     def numerical_lp(self):
+        if self.tier is None:
+            return None
         return LeagueTier[self.tier].value * 1000 + LeagueRank[self.rank].value * 100 + self.league_points
+
+    @numerical_lp.expression
+    def numerical_lp(cls):
+        # Literals instead of bound parameters so the planner matches queries to ix_accounts_server_numerical_lp,
+        # NULL for unranked accounts like the Python side
+        tiers = case({literal_column(f"'{tier.name}'"): literal_column(str(tier.value)) for tier in LeagueTier}, value=cls.tier)
+        ranks = case({literal_column(f"'{rank.name}'"): literal_column(str(rank.value)) for rank in LeagueRank}, value=cls.rank)
+        return (tiers * literal_column("1000") + ranks * literal_column("100") + cls.league_points).self_group()
     
     @classmethod
     async def check_if_username_and_tag_exists(cls, session: AsyncSession, username: str, tag: str, server: str) -> bool:
@@ -94,5 +108,14 @@ class Account(Base):
     async def fetch_all_from_server(cls, session: AsyncSession, server: str):
         result = await session.execute(select(cls).filter(cls.server == server))
         return result.scalars().all()
+
+    @classmethod
+    async def fetch_top_from_server(cls, session: AsyncSession, server: str, limit: int = 10):
+        result = await session.execute(select(cls).filter(cls.server == server, cls.numerical_lp.is_not(None))
+                                       .order_by(cls.numerical_lp.desc()).limit(limit))
+        return result.scalars().all()
+
+# Declared after the class as it is on the numerical_lp expression
+Index("ix_accounts_server_numerical_lp", Account.server, Account.numerical_lp.desc())
     
 
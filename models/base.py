@@ -1,3 +1,31 @@
+from typing import Callable, Dict, Optional
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.sql import select
 
-Base = declarative_base()
+# Relationships are never loaded implicitly, fetchers take a loader profile naming what they need.
+# Any other relationship access raises a clear error naming the relationship. An implicit load could
+# not run under AsyncSession anyway, it would fail with a MissingGreenlet error instead.
+LAZY = "raise_on_sql"
+
+class ModelBase:
+    # Profile name -> function returning the loader options, functions so other models can be referenced
+    __loader_profiles__: Dict[str, Callable[[], tuple]] = {}
+
+    @classmethod
+    def loader_options(cls, profile: Optional[str] = None) -> list:
+        if profile is None:
+            return []
+        if profile not in cls.__loader_profiles__:
+            raise ValueError(f"{cls.__name__} has no loader profile '{profile}'")
+        return list(cls.__loader_profiles__[profile]())
+
+    @classmethod
+    async def _get(cls, session, ident, profile: Optional[str] = None):
+        # session.get returns an instance that is already in the session as is, a query is needed
+        # for the profile's relationships to be loaded onto it
+        if profile is None:
+            return await session.get(cls, ident)
+        result = await session.execute(select(cls).where(cls.__mapper__.primary_key[0] == ident).options(*cls.loader_options(profile)))
+        return result.scalars().first()
+
+Base = declarative_base(cls=ModelBase)
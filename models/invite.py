@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey, DateTime, BigInteger
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, DateTime, BigInteger, Index, update
+from sqlalchemy.orm import relationship, joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func, select
-from .base import Base
+from .base import Base, LAZY
 from datetime import datetime, timedelta
+from typing import Optional
 from models.team import Team
 
 class Invite(Base):
@@ -19,10 +20,25 @@ class Invite(Base):
     approved_at = Column(DateTime)
     expires_at = Column(DateTime)
     active = Column(Boolean, default=True) # False = declined, expired, not approved, True = active
+    approval_message_id = Column(BigInteger) # Approval request in INVITE_CHANNEL, edited when the invite expires
+
+    # Only active invites are looked up by player, inactive ones are history. The invite expiry sweeper
+    # deactivates expired invites, so the partial indexes only cover live invites and the few that
+    # expired since the last sweep, which the queries filter out with live()
+    __table_args__ = (
+        Index("ix_invites_invitee_active", "invitee_id", postgresql_where=active == True),
+        Index("ix_invites_inviter_active", "inviter_id", postgresql_where=active == True),
+        Index("ix_invites_expires_active", "expires_at", postgresql_where=active == True),
+    )
     
-    inviter = relationship("Player", foreign_keys=[inviter_id], back_populates="invites_sent", lazy="selectin")
-    invitee = relationship("Player", foreign_keys=[invitee_id], back_populates="invites_received", lazy="selectin")
-    team = relationship("Team", foreign_keys=[team_id], lazy="selectin")
+    inviter = relationship("Player", foreign_keys=[inviter_id], back_populates="invites_sent", lazy=LAZY)
+    invitee = relationship("Player", foreign_keys=[invitee_id], back_populates="invites_received", lazy=LAZY)
+    team = relationship("Team", foreign_keys=[team_id], lazy=LAZY)
+
+    __loader_profiles__ = {
+        # Both players and the team, for the approval and decline messages
+        "details": lambda: (joinedload(Invite.inviter), joinedload(Invite.invitee), joinedload(Invite.team)),
+    }
 
     @classmethod
     async def create(cls, session: AsyncSession, inviter_id: int, invitee_id: int, team_id: int, expires_at: datetime):
@@ -68,38 +84,70 @@ class Invite(Base):
             invite.active = False
             await session.flush()
     
+    @classmethod
+    def live(cls, now: Optional[datetime] = None):
+        """Condition for invites that are active and not expired."""
+        return (cls.active == True) & ((cls.expires_at == None) | (cls.expires_at > (now or datetime.now())))
+
+    def is_live(self, now: Optional[datetime] = None) -> bool:
+        """Python side of live(), for an invite that is already loaded."""
+        return bool(self.active) and (self.expires_at is None or self.expires_at > (now or datetime.now()))
+
+    @classmethod
+    async def expire_overdue(cls, session: AsyncSession, now: Optional[datetime] = None):
+        """Deactivate every active invite past its expiry in one statement, returns the expired invites'
+        (id, team_id, inviter_id, invitee_id, expires_at, approved, approval_message_id) rows.
+        """
+        result = await session.execute(
+            update(cls)
+            .where(cls.active == True, cls.expires_at < (now or datetime.now()))
+            .values(active=False)
+            .returning(cls.id, cls.team_id, cls.inviter_id, cls.invitee_id, cls.expires_at, cls.approved, cls.approval_message_id),
+            execution_options={"synchronize_session": False},
+        )
+        return result.all()
+
+    @classmethod
+    def _keyset(cls, query, after_id: Optional[int], limit: Optional[int]):
+        # Pages of invites in creation order, continuing after the last invite of the previous page
+        if after_id is not None:
+            query = query.where(cls.id > after_id)
+        return query.order_by(cls.id).limit(limit)
+
     # Fetchters
     @classmethod
-    async def fetch_from_id(cls, session: AsyncSession, invite_id: int):
-        invite = await session.get(cls, invite_id)
+    async def fetch_from_id(cls, session: AsyncSession, invite_id: int, profile: Optional[str] = None):
+        invite = await cls._get(session, invite_id, profile)
         return invite
 
     @classmethod
-    async def fetch_all_invites_by_invitee(cls, session: AsyncSession, invitee_id: int):
-        invites = await session.execute(select(cls).where(cls.invitee_id == invitee_id))
+    async def fetch_all_invites_by_invitee(cls, session: AsyncSession, invitee_id: int, profile: Optional[str] = None):
+        invites = await session.execute(select(cls).where(cls.invitee_id == invitee_id).options(*cls.loader_options(profile)))
         return invites.scalars().all()
     
     @classmethod
-    async def fetch_all_invites_by_inviter(cls, session: AsyncSession, inviter_id: int):
-        invites = await session.execute(select(cls).where(cls.inviter_id == inviter_id))
+    async def fetch_all_invites_by_inviter(cls, session: AsyncSession, inviter_id: int, profile: Optional[str] = None):
+        invites = await session.execute(select(cls).where(cls.inviter_id == inviter_id).options(*cls.loader_options(profile)))
         return invites.scalars().all()
     
     @classmethod
-    async def fetch_active_invites_by_invitee(cls, session: AsyncSession, invitee_id: int):
-        invites = await session.execute(select(cls).where(cls.invitee_id == invitee_id).where(cls.active == True))
+    async def fetch_active_invites_by_invitee(cls, session: AsyncSession, invitee_id: int, profile: Optional[str] = None, after_id: Optional[int] = None, limit: Optional[int] = None):
+        query = select(cls).where(cls.invitee_id == invitee_id).where(cls.live()).options(*cls.loader_options(profile))
+        invites = await session.execute(cls._keyset(query, after_id, limit))
         return invites.scalars().all()
 
     @classmethod
-    async def fetch_active_invites_by_inviter(cls, session: AsyncSession, inviter_id: int):
-        invites = await session.execute(select(cls).where(cls.inviter_id == inviter_id).where(cls.active == True))
+    async def fetch_active_invites_by_inviter(cls, session: AsyncSession, inviter_id: int, profile: Optional[str] = None, after_id: Optional[int] = None, limit: Optional[int] = None):
+        query = select(cls).where(cls.inviter_id == inviter_id).where(cls.live()).options(*cls.loader_options(profile))
+        invites = await session.execute(cls._keyset(query, after_id, limit))
         return invites.scalars().all()
     
     @classmethod
-    async def fetch_active_invite_by_team_id_and_invitee(cls, session: AsyncSession, team_id: int, invitee_id: int):
-        invite = await session.execute(select(cls).where(cls.team_id == team_id).where(cls.invitee_id == invitee_id).where(cls.active == True))
+    async def fetch_active_invite_by_team_id_and_invitee(cls, session: AsyncSession, team_id: int, invitee_id: int, profile: Optional[str] = None):
+        invite = await session.execute(select(cls).where(cls.team_id == team_id).where(cls.invitee_id == invitee_id).where(cls.live()).options(*cls.loader_options(profile)))
         return invite.scalars().first()
     
     @classmethod
-    async def fetch_active_invite_by_team_tag_and_invitee(cls, session: AsyncSession, team_tag: str, invitee_id: int):
-        invite = await session.execute(select(cls).join(Team).where(Team.tag == team_tag).where(cls.invitee_id == invitee_id).where(cls.active == True))
+    async def fetch_active_invite_by_team_tag_and_invitee(cls, session: AsyncSession, team_tag: str, invitee_id: int, profile: Optional[str] = None):
+        invite = await session.execute(select(cls).join(Team).where(Team.tag == team_tag).where(cls.invitee_id == invitee_id).where(cls.live()).options(*cls.loader_options(profile)))
         return invite.scalars().first()
@@ -0,0 +1,115 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Index, insert, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func, select, delete
+from datetime import datetime
+from typing import Optional
+from .base import Base
+import models
+
+class LeaderboardEntry(Base):
+    """Best ranked account of each player on each server, with the player's position on the
+    server's ladder overall, among players of the same role, of the same team league and both.
+
+    The table is rebuilt from accounts_table by refresh after every rank sweep, reading a page of
+    any ladder is then a range scan of one of its indexes.
+    """
+    __tablename__ = "leaderboard_table"
+
+    server = Column(String, primary_key=True)
+    player_id = Column(BigInteger, primary_key=True)
+    account_id = Column(Integer, nullable=False)
+    summoner_name = Column(String, nullable=False)
+    summoner_tag = Column(String, nullable=False)
+    tier = Column(String, nullable=False)
+    rank = Column(String, nullable=False)
+    league_points = Column(Integer, nullable=False)
+    numerical_lp = Column(Integer, nullable=False)
+    role = Column(String)
+    league = Column(String)
+    position = Column(Integer, nullable=False)
+    role_position = Column(Integer, nullable=False)
+    league_position = Column(Integer, nullable=False)
+    role_league_position = Column(Integer, nullable=False)
+    refreshed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_leaderboard_position", "server", "position"),
+        Index("ix_leaderboard_role_position", "server", "role", "role_position"),
+        Index("ix_leaderboard_league_position", "server", "league", "league_position"),
+        Index("ix_leaderboard_role_league_position", "server", "role", "league", "role_league_position"),
+    )
+
+    @classmethod
+    def position_column(cls, role: Optional[str] = None, league: Optional[str] = None):
+        if role and league:
+            return cls.role_league_position
+        if role:
+            return cls.role_position
+        if league:
+            return cls.league_position
+        return cls.position
+
+    @classmethod
+    async def refresh(cls, session: AsyncSession, now: datetime = None) -> int:
+        """Rebuild the leaderboard in the session's transaction, returns the number of entries.
+
+        Readers keep seeing the previous leaderboard until the transaction commits.
+        """
+        Account, Player, Team = models.Account, models.Player, models.Team
+        now = now or datetime.now()
+        best = (
+            select(
+                Account.server,
+                Account.player_id,
+                Account.id.label("account_id"),
+                Account.summoner_name,
+                Account.summoner_tag,
+                Account.tier,
+                Account.rank,
+                Account.league_points,
+                Account.numerical_lp.label("numerical_lp"),
+                Player.role,
+                Team.league,
+            )
+            .join(Player, Player.discord_id == Account.player_id)
+            .outerjoin(Team, (Team.id == Player.team_id) & (Team.active == True))
+            .where(Account.numerical_lp.is_not(None))
+            .distinct(Account.server, Account.player_id)
+            .order_by(Account.server, Account.player_id, Account.numerical_lp.desc(), Account.id)
+            .subquery()
+        )
+
+        def ladder_position(*partition_by):
+            # Ties are broken by account id so every position is unique and pages never overlap
+            return func.row_number().over(partition_by=(best.c.server, *partition_by), order_by=(best.c.numerical_lp.desc(), best.c.account_id))
+
+        ranked = select(
+            *best.c,
+            ladder_position().label("position"),
+            ladder_position(best.c.role).label("role_position"),
+            ladder_position(best.c.league).label("league_position"),
+            ladder_position(best.c.role, best.c.league).label("role_league_position"),
+            literal(now, DateTime).label("refreshed_at"),
+        )
+        await session.execute(delete(cls))
+        columns = [column.name for column in best.c] + ["position", "role_position", "league_position", "role_league_position", "refreshed_at"]
+        result = await session.execute(insert(cls).from_select(columns, ranked))
+        return result.rowcount
+
+    @classmethod
+    async def fetch_page(cls, session: AsyncSession, server: str, role: Optional[str] = None, league: Optional[str] = None, after: Optional[int] = None, limit: int = 10):
+        """Entries of a ladder in order, starting after the position `after`."""
+        position = cls.position_column(role, league)
+        query = select(cls).where(cls.server == server)
+        if role:
+            query = query.where(cls.role == role)
+        if league:
+            query = query.where(cls.league == league)
+        if after is not None:
+            query = query.where(position > after)
+        result = await session.execute(query.order_by(position).limit(limit))
+        return result.scalars().all()
+
+    @classmethod
+    async def fetch_from_player_id(cls, session: AsyncSession, server: str, player_id: int) -> Optional["LeaderboardEntry"]:
+        return await session.get(cls, (server, player_id))
@@ -1,12 +1,12 @@
-from sqlalchemy import Table, Column, BigInteger, Integer, String, Boolean, ForeignKey, DateTime
-from sqlalchemy.orm import relationship, joinedload
-from sqlalchemy.sql import func, select
+from sqlalchemy import Table, Column, BigInteger, Integer, String, Boolean, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship, joinedload, selectinload
+from sqlalchemy.sql import func, select, update
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
 from config import NICKNAME_CHARACTER_LIMIT, BIO_CHARACTER_LIMIT
-from .base import Base
+from .base import Base, LAZY
 import models
 from typing import Optional
 class PlayerAlreadyInTeam(Exception):
@@ -32,18 +32,29 @@ class Player(Base):
     bio = Column(String(BIO_CHARACTER_LIMIT))
     role = Column(String)
 
+    __table_args__ = (
+        Index("ix_players_team_id", "team_id"),
+    )
+
     # Many-to-one relationship with Team
-    team = relationship("Team", back_populates="players", foreign_keys=[team_id], lazy="selectin")
+    team = relationship("Team", back_populates="players", foreign_keys=[team_id], lazy=LAZY)
 
     # One-to-one relationship with captain (specific player as captain)
-    captained_team = relationship("Team", back_populates="captain", foreign_keys="Team.captain_id", uselist=False)
-
-    invites_sent = relationship("Invite", foreign_keys="Invite.inviter_id", back_populates="inviter")
-    invites_received = relationship("Invite", foreign_keys="Invite.invitee_id", back_populates="invitee")
-    strikes_issued = relationship("Strike", foreign_keys="Strike.issued_by_id", back_populates="issued_by")
-    strikes_received = relationship("Strike", foreign_keys="Strike.issued_for_id", back_populates="issued_for_player")
-    transfers = relationship("Transfer", back_populates="player", lazy="selectin")
-    accounts = relationship("Account", back_populates="player", foreign_keys="Account.player_id", lazy="selectin")
+    captained_team = relationship("Team", back_populates="captain", foreign_keys="Team.captain_id", uselist=False, lazy=LAZY)
+
+    invites_sent = relationship("Invite", foreign_keys="Invite.inviter_id", back_populates="inviter", lazy=LAZY)
+    invites_received = relationship("Invite", foreign_keys="Invite.invitee_id", back_populates="invitee", lazy=LAZY)
+    strikes_issued = relationship("Strike", foreign_keys="Strike.issued_by_id", back_populates="issued_by", lazy=LAZY)
+    strikes_received = relationship("Strike", foreign_keys="Strike.issued_for_id", back_populates="issued_for_player", lazy=LAZY)
+    transfers = relationship("Transfer", back_populates="player", lazy=LAZY)
+    accounts = relationship("Account", back_populates="player", foreign_keys="Account.player_id", lazy=LAZY)
+
+    __loader_profiles__ = {
+        # Accounts, team and team captain shown by /profile
+        "profile": lambda: (selectinload(Player.accounts), joinedload(Player.team).joinedload(models.Team.captain)),
+        # Transfers with the team of each one
+        "history": lambda: (selectinload(Player.transfers).joinedload(models.Transfer.team),),
+    }
     
     @classmethod
     async def is_captain(cls, session: AsyncSession, discord_id: int) -> bool:
@@ -90,6 +101,21 @@ class Player(Base):
         self.team_id = None
         await session.flush()
 
+    @classmethod
+    async def remove_all_from_team(cls, session: AsyncSession, team_id: int):
+        """Remove every player from a team in one statement, returns the (discord_id, role) rows of the removed players."""
+        result = await session.execute(
+            update(cls).where(cls.team_id == team_id).values(team_id=None).returning(cls.discord_id, cls.role),
+            execution_options={"synchronize_session": "fetch"},
+        )
+        return result.all()
+
+    @classmethod
+    async def fetch_roster_rows(cls, session: AsyncSession):
+        """(discord_id, nickname, team_id) of every player, without loading the models."""
+        result = await session.execute(select(cls.discord_id, cls.nickname, cls.team_id))
+        return result.all()
+
     @classmethod
     async def exists(cls, session: AsyncSession, discord_id: int) -> bool:
         result = await session.get(cls, discord_id)
@@ -97,28 +123,28 @@ class Player(Base):
     
     # Fetchers
     @classmethod
-    async def fetch_from_discord_id(cls, session: AsyncSession, discord_id: int) -> Optional["Player"]:
-        result = await session.get(cls, discord_id)
+    async def fetch_from_discord_id(cls, session: AsyncSession, discord_id: int, profile: Optional[str] = None) -> Optional["Player"]:
+        result = await cls._get(session, discord_id, profile)
         return result
 
     @classmethod
-    async def fetch_all_from_team_id(cls, session: AsyncSession, team_id: int) -> list["Player"]:
-        result = await session.execute(select(cls).filter(cls.team_id == team_id))
+    async def fetch_all_from_team_id(cls, session: AsyncSession, team_id: int, profile: Optional[str] = None) -> list["Player"]:
+        result = await session.execute(select(cls).filter(cls.team_id == team_id).options(*cls.loader_options(profile)))
         return result.scalars().all()
     
     @classmethod
-    async def fetch_all_from_team_name(cls, session: AsyncSession, team_name: str) -> list["Player"]:
-        result = await session.execute(select(cls).join(models.Team).filter(models.Team.c.name == team_name))
+    async def fetch_all_from_team_name(cls, session: AsyncSession, team_name: str, profile: Optional[str] = None) -> list["Player"]:
+        result = await session.execute(select(cls).join(models.Team).filter(models.Team.c.name == team_name).options(*cls.loader_options(profile)))
         return result.scalars().all()
     
     @classmethod
-    async def fetch_all(cls, session: AsyncSession) -> list["Player"]:
-        result = await session.execute(select(cls))
+    async def fetch_all(cls, session: AsyncSession, profile: Optional[str] = None) -> list["Player"]:
+        result = await session.execute(select(cls).options(*cls.loader_options(profile)))
         return result.scalars().all()
     
     @classmethod
-    async def fetch_all_premium(cls, session: AsyncSession) -> list["Player"]:
-        result = await session.execute(select(cls).filter(cls.is_premium == True))
+    async def fetch_all_premium(cls, session: AsyncSession, profile: Optional[str] = None) -> list["Player"]:
+        result = await session.execute(select(cls).filter(cls.is_premium == True).options(*cls.loader_options(profile)))
         return result.scalars().all()
     
     @classmethod
@@ -127,6 +153,6 @@ class Player(Base):
         return result.scalar_one()
 
     @classmethod
-    async def fetch_players_without_team(cls, session: AsyncSession) -> list["Player"]:
-        result = await session.execute(select(cls).filter(cls.team_id == None))
+    async def fetch_players_without_team(cls, session: AsyncSession, profile: Optional[str] = None) -> list["Player"]:
+        result = await session.execute(select(cls).filter(cls.team_id == None).options(*cls.loader_options(profile)))
         return result.scalars().all()
\ No newline at end of file
@@ -0,0 +1,83 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func, select, delete
+from datetime import datetime, timedelta
+from .base import Base, LAZY
+from config import RANK_HISTORY_FULL_RESOLUTION_DAYS, RANK_HISTORY_SEASON_DAYS
+
+class RankSnapshot(Base):
+    __tablename__ = "rank_history_table"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    account_id = Column(Integer, ForeignKey("accounts_table.id", ondelete="CASCADE"), nullable=False)
+    recorded_at = Column(DateTime, nullable=False, server_default=func.now())
+    tier = Column(String)
+    rank = Column(String)
+    league_points = Column(Integer)
+    wins = Column(Integer)
+    losses = Column(Integer)
+
+    account = relationship("Account", lazy=LAZY)
+
+    __table_args__ = (
+        # Range queries for a single account read the index in order
+        Index("ix_rank_history_account_recorded", "account_id", "recorded_at"),
+    )
+
+    @classmethod
+    def record(cls, session: AsyncSession, account) -> "RankSnapshot":
+        """Add a snapshot of the account's current rank, written with the session's next flush.
+
+        Only call this when the rank changed, unchanged values are not stored.
+        """
+        snapshot = cls(
+            account_id=account.id,
+            recorded_at=datetime.now(),
+            tier=account.tier,
+            rank=account.rank,
+            league_points=account.league_points,
+            wins=account.wins,
+            losses=account.losses,
+        )
+        session.add(snapshot)
+        return snapshot
+
+    @classmethod
+    async def fetch_range(cls, session: AsyncSession, account_id: int, start: datetime = None, end: datetime = None):
+        query = select(cls).where(cls.account_id == account_id)
+        if start:
+            query = query.where(cls.recorded_at >= start)
+        if end:
+            query = query.where(cls.recorded_at <= end)
+        result = await session.execute(query.order_by(cls.recorded_at))
+        return result.scalars().all()
+
+    @classmethod
+    async def downsample(cls, session: AsyncSession, now: datetime = None) -> int:
+        """Thin out old snapshots, returns the number of deleted rows.
+
+        Snapshots are kept at full resolution for RANK_HISTORY_FULL_RESOLUTION_DAYS, then only the last
+        one of each day is kept, and after RANK_HISTORY_SEASON_DAYS only the last one of each week.
+        """
+        now = now or datetime.now()
+        full_cutoff = now - timedelta(days=RANK_HISTORY_FULL_RESOLUTION_DAYS)
+        daily_cutoff = now - timedelta(days=RANK_HISTORY_SEASON_DAYS)
+        deleted = 0
+        for bucket, newer_than, older_than in (("day", daily_cutoff, full_cutoff), ("week", None, daily_cutoff)):
+            ranked = select(
+                cls.id,
+                func.row_number().over(
+                    partition_by=(cls.account_id, func.date_trunc(bucket, cls.recorded_at)),
+                    order_by=cls.recorded_at.desc(),
+                ).label("position"),
+            ).where(cls.recorded_at < older_than)
+            if newer_than:
+                ranked = ranked.where(cls.recorded_at >= newer_than)
+            ranked = ranked.subquery()
+            result = await session.execute(
+                delete(cls).where(cls.id.in_(select(ranked.c.id).where(ranked.c.position > 1))),
+                execution_options={"synchronize_session": False},
+            )
+            deleted += result.rowcount
+        return deleted
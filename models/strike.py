@@ -1,25 +1,32 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import select
-from datetime import datetime, timezone
-from .base import Base
+from sqlalchemy.sql import func, select
+from datetime import datetime
+from typing import Optional
+from .base import Base, LAZY
 
 class Strike(Base):
     __tablename__ = "strikes_table"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    issued_by_id = Column(Integer, ForeignKey("players_table.discord_id"))
-    issued_for_id = Column(Integer, ForeignKey("players_table.discord_id"), nullable=True)
+    issued_by_id = Column(BigInteger, ForeignKey("players_table.discord_id"))
+    issued_for_id = Column(BigInteger, ForeignKey("players_table.discord_id"), nullable=True)
     issued_for_team_id = Column(Integer, ForeignKey("teams_table.id"), nullable=True)
     reason = Column(String)
     punishment = Column(String)
     expires_at = Column(DateTime)
     is_team_strike = Column(Boolean, default=False)
+    issued_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_strikes_issued_for_expires", "issued_for_id", "expires_at"),
+        Index("ix_strikes_team_expires", "issued_for_team_id", "expires_at"),
+    )
     
-    issued_by = relationship("Player", foreign_keys=[issued_by_id], back_populates="strikes_issued")
-    issued_for_player = relationship("Player", foreign_keys=[issued_for_id], back_populates="strikes_received")
-    issued_for_team = relationship("Team", foreign_keys=[issued_for_team_id], back_populates="strikes_received")
+    issued_by = relationship("Player", foreign_keys=[issued_by_id], back_populates="strikes_issued", lazy=LAZY)
+    issued_for_player = relationship("Player", foreign_keys=[issued_for_id], back_populates="strikes_received", lazy=LAZY)
+    issued_for_team = relationship("Team", foreign_keys=[issued_for_team_id], back_populates="strikes_received", lazy=LAZY)
 
     @classmethod
     async def create_player_strike(cls, session: AsyncSession, issued_by_id: int, issued_for_id: int, reason: str, punishment: str, expires_at: datetime):
@@ -35,6 +42,19 @@ class Strike(Base):
         await session.flush()
         return strike
 
+    @classmethod
+    async def fetch_page(cls, session: AsyncSession, issued_for_id: Optional[int] = None, issued_for_team_id: Optional[int] = None, before_id: Optional[int] = None, limit: int = 10):
+        """Strikes of a player or a team, latest first, continuing before the last strike of the previous page."""
+        query = select(cls)
+        if issued_for_id is not None:
+            query = query.where(cls.issued_for_id == issued_for_id)
+        if issued_for_team_id is not None:
+            query = query.where(cls.issued_for_team_id == issued_for_team_id)
+        if before_id is not None:
+            query = query.where(cls.id < before_id)
+        strikes = await session.execute(query.order_by(cls.id.desc()).limit(limit))
+        return strikes.scalars().all()
+
     @classmethod
     async def fetch_all_user_strikes_from_id(cls, session: AsyncSession, issued_for_id: int):
         strikes = await session.execute(select(cls).where(cls.issued_for_id == issued_for_id))
@@ -42,7 +62,7 @@ class Strike(Base):
     
     @classmethod
     async def fetch_active_user_strikes(cls, session: AsyncSession, issued_for_id: int):
-        current_time = datetime.now(timezone.utc)
+        current_time = datetime.now()
         strikes = await session.execute(
             select(cls).where(
                 (
@@ -60,7 +80,7 @@ class Strike(Base):
     
     @classmethod
     async def fetch_active_team_strikes(cls, session: AsyncSession, issued_for_team_id: int):
-        current_time = datetime.now(timezone.utc)
+        current_time = datetime.now()
         strikes = await session.execute(
             select(cls).where(
                 (
@@ -73,7 +93,7 @@ class Strike(Base):
 
     @classmethod
     async def fetch_active_strikes(cls, session: AsyncSession):
-        current_time = datetime.now(timezone.utc)
+        current_time = datetime.now()
         strikes = await session.execute(
             select(cls).where(
                 (
@@ -1,11 +1,12 @@
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, BigInteger, or_, join, and_
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, BigInteger, Index, or_, join, and_
+from sqlalchemy.orm import relationship, joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql import func, select
 import models
 from config import TAG_CHARACTER_LIMIT
-from .base import Base
+from .base import Base, LAZY
 
 class TeamAlreadyExists(Exception):
     pass
@@ -28,12 +29,27 @@ class Team(Base):
     tokens_available = Column(Integer)
     active = Column(Boolean, default=True)
 
+    # Archived teams keep their name and tag, only active teams have to be unique
+    __table_args__ = (
+        Index("ix_teams_tag_active", "tag", "active"),
+        Index("ux_teams_name_active", "name", unique=True, postgresql_where=active == True),
+        Index("ux_teams_tag_active", "tag", unique=True, postgresql_where=active == True),
+        # The trigram indexes used by search_by_name_or_tag_in_league need pg_trgm and are only created by migration 3
+    )
+
     # One-to-many relationship with Player (players in a team)
-    players = relationship("Player", back_populates="team", foreign_keys="[Player.team_id]", lazy="selectin")
+    players = relationship("Player", back_populates="team", foreign_keys="[Player.team_id]", lazy=LAZY)
     # One-to-one relationship with captain (specific player as captain)
-    captain = relationship("Player", back_populates="captained_team", foreign_keys=[captain_id], uselist=False, lazy="selectin")
-    transfers = relationship("Transfer", back_populates="team", foreign_keys="[Transfer.team_id]", lazy="selectin")
-    strikes_received = relationship("Strike", foreign_keys="Strike.issued_for_team_id", back_populates="issued_for_team")
+    captain = relationship("Player", back_populates="captained_team", foreign_keys=[captain_id], uselist=False, lazy=LAZY)
+    transfers = relationship("Transfer", back_populates="team", foreign_keys="[Transfer.team_id]", lazy=LAZY)
+    strikes_received = relationship("Strike", foreign_keys="Strike.issued_for_team_id", back_populates="issued_for_team", lazy=LAZY)
+
+    __loader_profiles__ = {
+        # Players and captain of the team
+        "roster": lambda: (selectinload(Team.players), joinedload(Team.captain)),
+        # Transfers with the player of each one
+        "history": lambda: (selectinload(Team.transfers).joinedload(models.Transfer.player),),
+    }
     
     @classmethod
     async def name_or_tag_exists(cls, session: AsyncSession, name: str, tag: str) -> bool:
@@ -72,7 +88,11 @@ class Team(Base):
         
         team = cls(name=name, tag=tag, captain_id=captain_id, league=league)
         session.add(team)
-        await session.flush()
+        try:
+            await session.flush()
+        except IntegrityError:
+            # Created by someone else since the checks above
+            raise TeamAlreadyExists(f"Team '{name}' ({tag}) already exists")
         return team
 
     
@@ -86,51 +106,58 @@ class Team(Base):
 
     # Fetchers
     @classmethod
-    async def fetch_from_id(cls, session: AsyncSession, team_id: int):
-        team = await session.get(cls, team_id)
+    async def fetch_from_id(cls, session: AsyncSession, team_id: int, profile: Optional[str] = None):
+        team = await cls._get(session, team_id, profile)
         return team
 
     @classmethod
-    async def fetch_from_name(cls, session: AsyncSession, name: str):
-        team = await session.execute(select(cls).where(cls.name == name))
+    async def fetch_from_name(cls, session: AsyncSession, name: str, profile: Optional[str] = None):
+        team = await session.execute(select(cls).where(cls.name == name).options(*cls.loader_options(profile)))
         return team.scalars().first()
     
     @classmethod
-    async def fetch_from_tag(cls, session: AsyncSession, tag: str):
-        team = await session.execute(select(cls).where(cls.tag == tag))
+    async def fetch_from_tag(cls, session: AsyncSession, tag: str, profile: Optional[str] = None):
+        team = await session.execute(select(cls).where(cls.tag == tag).options(*cls.loader_options(profile)))
         return team.scalars().first()
     
     @classmethod
-    async def fetch_from_captain_id(cls, session: AsyncSession, captain_id: int):
-        team = await session.execute(select(cls).where(cls.captain_id == captain_id))
+    async def fetch_from_captain_id(cls, session: AsyncSession, captain_id: int, profile: Optional[str] = None):
+        team = await session.execute(select(cls).where(cls.captain_id == captain_id).options(*cls.loader_options(profile)))
         return team.scalars().first()
 
     @classmethod
-    async def fetch_all(cls, session: AsyncSession):
-        teams = await session.execute(select(cls).where(cls.active == True))
+    async def fetch_all(cls, session: AsyncSession, profile: Optional[str] = None):
+        teams = await session.execute(select(cls).where(cls.active == True).options(*cls.loader_options(profile)))
         return teams.scalars().all()
     
     @classmethod
-    async def fetch_all_from_league(cls, session: AsyncSession, league: str):
-        teams = await session.execute(select(cls).where(cls.league == league))
+    async def fetch_all_from_league(cls, session: AsyncSession, league: str, profile: Optional[str] = None):
+        teams = await session.execute(select(cls).where(cls.league == league).options(*cls.loader_options(profile)))
         return teams.scalars().all()
 
     @classmethod
-    async def fetch_by_player_discord_id(cls, session: AsyncSession, discord_id: int):
+    async def fetch_by_player_discord_id(cls, session: AsyncSession, discord_id: int, profile: Optional[str] = None):
         result = await session.execute(
-            select(cls)
+            select(cls).options(*cls.loader_options(profile))
             .join(models.Player, models.Player.team_id == cls.id)
             .where(models.Player.discord_id == discord_id)
         )
         return result.scalars().first()
 
     @classmethod
-    async def search_by_name_or_tag_in_league(cls, session: AsyncSession, search_term: str, league: Optional[str] = None):
-        search_pattern = f"%{search_term}%"
+    async def search_by_name_or_tag_in_league(cls, session: AsyncSession, search_term: str, league: Optional[str] = None, limit: int = 25):
+        """Search active teams by name or tag, best match first.
+
+        Exact matches come first, then teams ranked by pg_trgm similarity. Both the substring and the
+        similarity (%) conditions are served by the trigram indexes from migration 3.
+        """
+        exact = or_(func.lower(cls.tag) == search_term.lower(), func.lower(cls.name) == search_term.lower())
+        similarity = func.greatest(func.similarity(cls.name, search_term), func.similarity(cls.tag, search_term))
         query = select(cls).filter(
             or_(
-                cls.name.ilike(search_pattern),
-                cls.tag.ilike(search_pattern),
+                cls.name.icontains(search_term, autoescape=True),
+                cls.tag.icontains(search_term, autoescape=True),
+                cls.name.op("%")(search_term),
             ),
             cls.active == True
         )
@@ -140,5 +167,21 @@ class Team(Base):
                 cls.league == league
             )
 
-        result = await session.execute(query)
+        result = await session.execute(query.order_by(exact.desc(), similarity.desc(), cls.name).limit(limit))
         return result.scalars().all()
+
+    @classmethod
+    async def fetch_rank_rows(cls, session: AsyncSession):
+        """(team id, team league, player id, player role, numerical LP) of every account of every player
+        of the active teams, players without an account have one row with a NULL numerical LP.
+
+        A single projection query, no models are loaded.
+        """
+        Player, Account = models.Player, models.Account
+        result = await session.execute(
+            select(cls.id.label("team_id"), cls.league, Player.discord_id.label("player_id"), Player.role, Account.numerical_lp.label("numerical_lp"))
+            .join(Player, Player.team_id == cls.id)
+            .outerjoin(Account, Account.player_id == Player.discord_id)
+            .where(cls.active == True)
+        )
+        return result.all()
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger, Index, tuple_, insert
 from sqlalchemy.sql import func, select
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from .base import Base
+from typing import List, Optional, Tuple
+from .base import Base, LAZY
+import models
 
 class Transfer(Base):
     __tablename__ = "transfers_table"
@@ -15,8 +17,18 @@ class Transfer(Base):
     transfer_type = Column(Integer)
     transfer_date = Column(DateTime, server_default=func.now())
 
-    player = relationship("Player", back_populates="transfers", foreign_keys=[player_id], lazy="selectin")
-    team = relationship("Team", back_populates="transfers", foreign_keys=[team_id], lazy="selectin")
+    # History is read newest first in (transfer_date, id) order, see fetch_history
+    __table_args__ = (
+        Index("ix_transfers_team_history", "team_id", "transfer_date", "id"),
+        Index("ix_transfers_player_history", "player_id", "transfer_date", "id"),
+    )
+
+    player = relationship("Player", back_populates="transfers", foreign_keys=[player_id], lazy=LAZY)
+    team = relationship("Team", back_populates="transfers", foreign_keys=[team_id], lazy=LAZY)
+
+    __loader_profiles__ = {
+        "history": lambda: (joinedload(Transfer.player), joinedload(Transfer.team)),
+    }
     
     # 0: Player leave
     # 1: Player join
@@ -28,32 +40,60 @@ class Transfer(Base):
         session.add(transfer)
         await session.flush()
         return transfer
+
+    @classmethod
+    async def create_many(cls, session: AsyncSession, transfers: List[dict]):
+        """Insert transfers given as column values in one statement, used by the transfer journal."""
+        if transfers:
+            await session.execute(insert(cls), transfers)
     
     @classmethod
-    async def fetch_all_transfers(cls, session: AsyncSession):
-        transfers = await session.execute(select(cls))
+    async def fetch_history(cls, session: AsyncSession, team_id: Optional[int] = None, player_id: Optional[int] = None, before: Optional[Tuple[datetime, int]] = None,
+                            from_date: Optional[datetime] = None, to_date: Optional[datetime] = None, limit: int = 25, profile: Optional[str] = None):
+        """Transfers of a team and/or player, newest first.
+
+        Pages continue from the (transfer_date, id) of the last transfer of the previous page given as `before`,
+        so every page is one range scan of the team or player history index however long the history is.
+        """
+        query = select(cls)
+        if team_id is not None:
+            query = query.where(cls.team_id == team_id)
+        if player_id is not None:
+            query = query.where(cls.player_id == player_id)
+        if from_date is not None:
+            query = query.where(cls.transfer_date >= from_date)
+        if to_date is not None:
+            query = query.where(cls.transfer_date <= to_date)
+        if before is not None:
+            query = query.where(tuple_(cls.transfer_date, cls.id) < tuple_(*before))
+        transfers = await session.execute(query.order_by(cls.transfer_date.desc(), cls.id.desc()).limit(limit).options(*cls.loader_options(profile)))
+        return transfers.scalars().all()
+
+    @classmethod
+    async def fetch_all_transfers(cls, session: AsyncSession, profile: Optional[str] = None):
+        transfers = await session.execute(select(cls).options(*cls.loader_options(profile)))
         return transfers.scalars().all()
     
     @classmethod
-    async def fetch_all_player_transfers_from_player_id(cls, session: AsyncSession, player_id: int):
-        transfers = await session.execute(select(cls).where(cls.player_id == player_id))
+    async def fetch_all_player_transfers_from_player_id(cls, session: AsyncSession, player_id: int, profile: Optional[str] = None):
+        transfers = await session.execute(select(cls).where(cls.player_id == player_id).options(*cls.loader_options(profile)))
         return transfers.scalars().all()
     
     @classmethod
-    async def fetch_all_team_transfers_from_team_name(cls, session: AsyncSession, team_name: str):
-        transfers = await session.execute(select(cls).where(cls.team_name == team_name))
+    async def fetch_all_team_transfers_from_team_name(cls, session: AsyncSession, team_name: str, profile: Optional[str] = None):
+        transfers = await session.execute(select(cls).join(cls.team).where(models.Team.name == team_name).options(*cls.loader_options(profile)))
         return transfers.scalars().all()
     
     @classmethod
-    async def fetch_all_team_transfers_from_team_id(cls, session: AsyncSession, team_id: int):
-        transfers = await session.execute(select(cls).where(cls.team_id == team_id).order_by(cls.transfer_date.desc()))
+    async def fetch_all_team_transfers_from_team_id(cls, session: AsyncSession, team_id: int, profile: Optional[str] = None):
+        transfers = await session.execute(select(cls).where(cls.team_id == team_id).order_by(cls.transfer_date.desc()).options(*cls.loader_options(profile)))
         return transfers.scalars().all()
     
     @classmethod
-    async def fetch_all_team_transfers_within_time_period_from_team_id(cls, session: AsyncSession, team_id: int, from_date: datetime, to_date: datetime):
+    async def fetch_all_team_transfers_within_time_period_from_team_id(cls, session: AsyncSession, team_id: int, from_date: datetime, to_date: datetime, profile: Optional[str] = None):
         transfers = await session.execute(select(cls).where(
-            cls.team_id == team_id &
-            cls.transfer_date >= from_date &
-            cls.transfer_date <= to_date
-        ))
+            (cls.team_id == team_id) &
+            (cls.transfer_date >= from_date) &
+            (cls.transfer_date <= to_date)
+        ).order_by(cls.transfer_date.desc()).options(*cls.loader_options(profile)))
         return transfers.scalars().all()
@@ -22,6 +22,16 @@ class LeagueServer(Enum):
     EUNE = "eun1"
     EUW = "euw1"
 
+    @property
+    def routing(self) -> str:
+        """Regional routing value used by account-v1 for this platform."""
+        return REGIONAL_ROUTING[self]
+
+REGIONAL_ROUTING = {
+    LeagueServer.EUNE: "europe",
+    LeagueServer.EUW: "europe",
+}
+
 class LeagueRole(Enum):
     Top = "Top"
     Jungle = "Jungle"
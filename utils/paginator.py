@@ -1,5 +1,9 @@
 from __future__ import annotations
+import asyncio
+from collections import OrderedDict
 from typing import (
+    Awaitable,
+    Callable,
     Dict,
     Generic,
     List,
@@ -8,6 +12,7 @@ from typing import (
     Any,
     TYPE_CHECKING,
     Sequence,
+    Tuple,
     Union,
 )
 
@@ -35,6 +40,96 @@ Page = Union[
 
 
 PageT_co = TypeVar("PageT_co", bound=Page, covariant=True)
+RowT = TypeVar("RowT")
+
+# Called with (page number, cursor), returns (page, cursor of the next page or None if it is the last page),
+# or None if there is no such page
+PageFetcher = Callable[[int, Any], Awaitable[Optional[Tuple[Any, Any]]]]
+
+
+class PageSource(Generic[PageT_co]):
+    """Pages produced on demand for ButtonPaginator, instead of a list built up front.
+
+    The cursor of the first page is None, OFFSET based fetchers can use the page number and keyset based
+    ones the cursor they returned for the previous page. Only the last `cache_size` pages used are kept,
+    cursors are kept for every page seen so an evicted page can be fetched again.
+    """
+
+    def __init__(self, fetch_page: PageFetcher, *, cache_size: int = 5) -> None:
+        self.fetch_page: PageFetcher = fetch_page
+        self.cache_size: int = cache_size
+        self.cache: OrderedDict[int, PageT_co] = OrderedDict()
+        self.cursors: Dict[int, Any] = {0: None}
+        self.pending: Dict[int, asyncio.Task] = {}
+        self.last_page: Optional[int] = None
+
+    @classmethod
+    def from_keyset(
+        cls,
+        fetch_rows: Callable[[Any, int], Awaitable[Sequence[RowT]]],
+        render: Callable[[Sequence[RowT], int], PageT_co],
+        key: Callable[[RowT], Any],
+        *,
+        per_page: int = 5,
+        cache_size: int = 5,
+    ) -> PageSource[PageT_co]:
+        """Pages of `per_page` rows, fetched with fetch_rows(key of the previous row or None, limit).
+
+        One row more than needed is fetched to know whether another page follows.
+        """
+        async def fetch_page(page_number: int, cursor: Any) -> Optional[Tuple[PageT_co, Any]]:
+            rows = await fetch_rows(cursor, per_page + 1)
+            if not rows:
+                return None
+            page = await discord.utils.maybe_coroutine(render, rows[:per_page], page_number)
+            return page, key(rows[per_page - 1]) if len(rows) > per_page else None
+
+        return cls(fetch_page, cache_size=cache_size)
+
+    def is_last(self, page_number: int) -> bool:
+        return self.last_page is not None and page_number >= self.last_page
+
+    async def get_page(self, page_number: int) -> Optional[PageT_co]:
+        if page_number in self.cache:
+            self.cache.move_to_end(page_number)
+            return self.cache[page_number]
+        if page_number < 0 or (self.last_page is not None and page_number > self.last_page):
+            return None
+        if page_number not in self.cursors:
+            # The cursor comes from the previous page
+            if await self.get_page(page_number - 1) is None or page_number not in self.cursors:
+                return None
+        return await asyncio.shield(self._fetch(page_number))
+
+    def prefetch(self, page_number: int) -> None:
+        if page_number in self.cursors and page_number not in self.cache:
+            # Failures are left for get_page to retry, only mark them as retrieved here
+            self._fetch(page_number).add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    def _fetch(self, page_number: int) -> asyncio.Task:
+        # Concurrent requests for a page, e.g. a click while it is being prefetched, share one fetch
+        task = self.pending.get(page_number)
+        if task is None:
+            task = self.pending[page_number] = asyncio.create_task(self._load(page_number))
+        return task
+
+    async def _load(self, page_number: int) -> Optional[PageT_co]:
+        try:
+            result = await self.fetch_page(page_number, self.cursors[page_number])
+        finally:
+            del self.pending[page_number]
+        if result is None:
+            self.last_page = page_number - 1
+            return None
+        page, next_cursor = result
+        if next_cursor is None:
+            self.last_page = page_number
+        else:
+            self.cursors[page_number + 1] = next_cursor
+        self.cache[page_number] = page
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return page
 
 
 class ButtonPaginator(Generic[PageT_co], discord.ui.View):
@@ -42,7 +137,7 @@ class ButtonPaginator(Generic[PageT_co], discord.ui.View):
 
     def __init__(
         self,
-        pages: Sequence[PageT_co],
+        pages: Union[Sequence[PageT_co], PageSource[PageT_co]],
         *,
         author_id: Optional[int] = None,
         timeout: Optional[float] = 60.0,
@@ -55,12 +150,16 @@ class ButtonPaginator(Generic[PageT_co], discord.ui.View):
 
         self.current_page: int = 0
         self.per_page: int = per_page
-        self.pages: Any = pages
-        total_pages, left_over = divmod(len(self.pages), self.per_page)
-        if left_over:
-            total_pages += 1
-
-        self.max_pages: int = total_pages
+        self.source: Optional[PageSource[PageT_co]] = pages if isinstance(pages, PageSource) else None
+        self.pages: Any = None if self.source else pages
+        if self.source:
+            # Unknown until the source reaches its last page
+            self.max_pages: Optional[int] = None
+        else:
+            total_pages, left_over = divmod(len(self.pages), self.per_page)
+            if left_over:
+                total_pages += 1
+            self.max_pages = total_pages
         self._page_kwargs: Dict[str, Any] = {"content": None, "embeds": [], "files": [], "view": self}
 
     def stop(self) -> None:
@@ -88,6 +187,19 @@ class ButtonPaginator(Generic[PageT_co], discord.ui.View):
             base = page_number * self.per_page
             return self.pages[base : base + self.per_page]
 
+    async def fetch_page(self, page_number: int) -> Union[PageT_co, Sequence[PageT_co]]:
+        if self.source is None:
+            return self.get_page(page_number)
+
+        page = await self.source.get_page(page_number)
+        if page is None:
+            # Past the end (found out on this click), stay on the last page
+            self.current_page = max(0, min(page_number, self.source.last_page or 0))
+            page = await self.source.get_page(self.current_page)
+        self.max_pages = None if self.source.last_page is None else self.source.last_page + 1
+        self.source.prefetch(self.current_page + 1)
+        return page
+
     def format_page(self, page: Union[PageT_co, Sequence[PageT_co]]) -> Union[PageT_co, Sequence[PageT_co]]:
         return page
 
@@ -126,6 +238,10 @@ class ButtonPaginator(Generic[PageT_co], discord.ui.View):
         return self._page_kwargs
 
     def update_buttons(self) -> None:
+        if self.max_pages is None:
+            self.previous_page.disabled = self.current_page <= 0
+            self.next_page.disabled = False
+            return
         self.previous_page.disabled = self.max_pages < 2 or self.current_page <= 0
         self.next_page.disabled = self.max_pages < 2 or self.current_page >= self.max_pages - 1
 
@@ -133,8 +249,9 @@ class ButtonPaginator(Generic[PageT_co], discord.ui.View):
         if self.message is None:
             self.message = interaction.message
 
+        page = await self.fetch_page(self.current_page)
         self.update_buttons()
-        kwargs = await self.get_page_kwargs(self.get_page(self.current_page))
+        kwargs = await self.get_page_kwargs(page)
         self.reset_files(kwargs)
         kwargs["attachments"] = kwargs.pop("files", [])
         await interaction.response.edit_message(**kwargs)
@@ -170,9 +287,10 @@ class ButtonPaginator(Generic[PageT_co], discord.ui.View):
     async def start(
         self, obj: Union[Interaction, Messageable], **send_kwargs: Any
     ) -> Optional[Union[discord.Message, discord.WebhookMessage]]:
+        page = await self.fetch_page(self.current_page)
         self.update_buttons()
-        kwargs = await self.get_page_kwargs(self.get_page(self.current_page))
-        if self.max_pages < 2:
+        kwargs = await self.get_page_kwargs(page)
+        if self.max_pages is not None and self.max_pages < 2:
             self.stop()
             del kwargs["view"]
 
@@ -0,0 +1,29 @@
+from typing import Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import select
+from models.player import Player
+
+class RegisteredPlayers:
+    """In-memory set of registered Discord IDs used by the cogs' interaction checks.
+
+    Warmed from players_table when the bot starts, then kept up to date by /register
+    and the member join/remove events, so the checks never have to query the database.
+    """
+    def __init__(self):
+        self.discord_ids: Set[int] = set()
+
+    async def warm_up(self, session: AsyncSession):
+        result = await session.execute(select(Player.discord_id))
+        self.discord_ids = set(result.scalars().all())
+
+    def __contains__(self, discord_id: int) -> bool:
+        return discord_id in self.discord_ids
+
+    def __len__(self) -> int:
+        return len(self.discord_ids)
+
+    def add(self, discord_id: int):
+        self.discord_ids.add(discord_id)
+
+    def discard(self, discord_id: int):
+        self.discord_ids.discard(discord_id)
@@ -0,0 +1,103 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from models.account import Account
+from utils.enums import LeagueServer, LeagueTier, LeagueRank
+from utils.riot_client import PooledRiotAPIClient
+from utils.util_funcs import get_account_info_from_puuid
+from config import RANK_REFRESH_CONCURRENCY
+
+def is_higher_rank(tier: str, rank: str, league_points: int, peak_tier: Optional[str], peak_rank: Optional[str], peak_league_points: Optional[int]) -> bool:
+    # An account without a peak (added while unranked) is beaten by any rank
+    if peak_tier is None:
+        return True
+    # If current tier is higher, update peak
+    # If current tier is same but current rank is higher, update peak
+    # If current tier is same, current rank is same but current lp is higher, update peak
+    current = (LeagueTier[tier].value, LeagueRank[rank].value, league_points)
+    peak = (LeagueTier[peak_tier].value, LeagueRank[peak_rank].value, peak_league_points or 0)
+    return current > peak
+
+def apply_ranked_update(account: Account, ranked: Optional[dict]) -> bool:
+    """Copy a solo queue league entry onto the account and bump its peak if needed.
+
+    Returns whether the tier, rank or LP changed, i.e. whether a rank history snapshot is due.
+    """
+    account.last_updated = datetime.now()
+    if not ranked:
+        return False
+
+    changed = (account.tier, account.rank, account.league_points) != (ranked["tier"], ranked["rank"], ranked["leaguePoints"])
+    account.tier = ranked["tier"]
+    account.rank = ranked["rank"]
+    account.league_points = ranked["leaguePoints"]
+    account.wins = ranked["wins"]
+    account.losses = ranked["losses"]
+
+    if is_higher_rank(ranked["tier"], ranked["rank"], ranked["leaguePoints"], account.peak_tier, account.peak_rank, account.peak_league_points):
+        account.peak_tier = ranked["tier"]
+        account.peak_rank = ranked["rank"]
+        account.peak_league_points = ranked["leaguePoints"]
+        account.peak_occurence = datetime.now()
+    return changed
+
+def apply_account_update(account: Account, riot_account: dict, summoner: dict, ranked: Optional[dict]) -> bool:
+    account.summoner_name = riot_account["gameName"]
+    account.summoner_tag = riot_account["tagLine"]
+    account.summoner_id = summoner["id"]
+    return apply_ranked_update(account, ranked)
+
+async def fetch_account_updates(client: PooledRiotAPIClient, accounts: List[Account], concurrency: int = RANK_REFRESH_CONCURRENCY) -> List[Tuple[Account, Optional[tuple], Optional[Exception]]]:
+    """Fetch fresh Riot data for several accounts at once.
+
+    Each account's account -> summoner -> league calls stay in order, at most `concurrency`
+    accounts per platform are fetched at the same time so a slow platform does not hold up the others.
+    Returns (account, (riot_account, summoner, ranked), error) per account, in the same order,
+    with either the data or the error set.
+    """
+    semaphores = defaultdict(lambda: asyncio.Semaphore(concurrency))
+
+    async def fetch(account: Account):
+        async with semaphores[account.server]:
+            try:
+                return account, await get_account_info_from_puuid(client, account.puuid, LeagueServer[account.server].value), None
+            except Exception as e:
+                return account, None, e
+
+    return await asyncio.gather(*(fetch(account) for account in accounts))
+
+async def fetch_apex_entries(client: PooledRiotAPIClient, platform: str, queue: str = "RANKED_SOLO_5x5") -> Dict[str, dict]:
+    """Fetch the challenger, grandmaster and master ladders of a platform in three calls.
+
+    Returns every entry keyed by both its summonerId and its puuid, with the ladder's tier added
+    so the entries have the same shape as the ones returned by entries-by-summoner.
+    """
+    entries = dict()
+    for fetch_league in (client.get_lol_league_v4_challenger_league_by_queue, client.get_lol_league_v4_grandmaster_league_by_queue, client.get_lol_league_v4_master_league_by_queue):
+        league = await fetch_league(region=platform, queue=queue)
+        for entry in league["entries"]:
+            entry = {**entry, "tier": league["tier"], "queueType": queue}
+            if entry.get("summonerId"):
+                entries[entry["summonerId"]] = entry
+            if entry.get("puuid"):
+                entries[entry["puuid"]] = entry
+    return entries
+
+async def ingest_apex_ladders(client: PooledRiotAPIClient, accounts: List[Account]) -> List[Tuple[Account, bool]]:
+    """Update every account found on its platform's apex ladders.
+
+    Returns (account, rank changed) for each updated account. Accounts that are not on a ladder
+    (everything below Master, or players that just dropped out of it) still need a per-account refresh.
+    """
+    updated = list()
+    for server in LeagueServer:
+        server_accounts = [account for account in accounts if account.server == server.name]
+        if not server_accounts:
+            continue
+        entries = await fetch_apex_entries(client, server.value)
+        for account in server_accounts:
+            entry = entries.get(account.summoner_id) or entries.get(account.puuid)
+            if entry:
+                updated.append((account, apply_ranked_update(account, entry)))
+    return updated
@@ -0,0 +1,196 @@
+import asyncio
+import contextvars
+import logging
+import aiohttp
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from config import RIOT_BACKGROUND_SHARE, RIOT_DEFAULT_APP_RATE_LIMIT, RIOT_MAX_RATE_LIMIT_RETRIES, RIOT_MAX_SERVER_ERROR_RETRIES, RIOT_ROUTING_CONCURRENCY
+
+# Riot counts requests in fixed windows that start with the first request, so
+# every bucket gets a little slack to absorb clock skew and request latency.
+WINDOW_PADDING = 0.1
+
+# Set by background work (the rank sweep) for its task, the tasks it starts inherit it
+background_calls = contextvars.ContextVar("background_calls", default=False)
+
+def parse_rate_limit_header(value: Optional[str]) -> List[Tuple[int, int]]:
+    """Parse a header like "20:1,100:120" into [(20, 1), (100, 120)]."""
+    if not value:
+        return []
+    pairs = []
+    for part in value.split(","):
+        count, window = part.strip().split(":")
+        pairs.append((int(count), int(window)))
+    return pairs
+
+class TokenBucket:
+    """Holds `limit` tokens that are all refilled once per `window` seconds."""
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.tokens = limit
+        self.resets_at: Optional[float] = None
+
+    def _refill(self, now: float):
+        if self.resets_at is not None and now >= self.resets_at:
+            self.tokens = self.limit
+            self.resets_at = None
+
+    def wait_time(self, now: float, reserved: int = 0) -> float:
+        """Seconds until a token is available while keeping `reserved` tokens of the window for others."""
+        self._refill(now)
+        if self.tokens > min(reserved, self.limit - 1):
+            return 0.0
+        return self.resets_at - now
+
+    def consume(self, now: float):
+        self._refill(now)
+        if self.resets_at is None:
+            self.resets_at = now + self.window + WINDOW_PADDING
+        self.tokens -= 1
+
+    def sync(self, limit: int, used: int, now: float):
+        """Align the bucket with the limit and count Riot reported for this window."""
+        self.limit = limit
+        self._refill(now)
+        if self.resets_at is None:
+            self.resets_at = now + self.window + WINDOW_PADDING
+        self.tokens = min(self.tokens, limit - used)
+
+class RiotRateLimiter:
+    """Queues Riot API calls behind app-wide and per-method token buckets.
+
+    Buckets are keyed by routing value (region), as that is how Riot applies its limits.
+    App limits start from RIOT_DEFAULT_APP_RATE_LIMIT, everything else is learned from the
+    X-App-Rate-Limit / X-Method-Rate-Limit headers, and 429s block the scope for Retry-After.
+    """
+    def __init__(self, default_app_limit: str = RIOT_DEFAULT_APP_RATE_LIMIT):
+        self.default_app_limit = parse_rate_limit_header(default_app_limit)
+        self.app_buckets: Dict[str, List[TokenBucket]] = {}
+        self.method_buckets: Dict[Tuple[str, str], List[TokenBucket]] = {}
+        self.blocked_until: Dict[object, float] = defaultdict(float)
+        self.locks: Dict[Tuple[str, str, bool], asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.throttled = 0
+        self.rate_limited = 0
+
+    def _buckets(self, region: str, method: str) -> List[TokenBucket]:
+        if region not in self.app_buckets:
+            self.app_buckets[region] = [TokenBucket(limit, window) for limit, window in self.default_app_limit]
+        return self.app_buckets[region] + self.method_buckets.get((region, method), [])
+
+    def wait_time(self, region: str, method: str, background: bool = False) -> float:
+        now = time.monotonic()
+        wait = max(self.blocked_until[region], self.blocked_until[(region, method)]) - now
+        for bucket in self._buckets(region, method):
+            reserved = int(bucket.limit * (1 - RIOT_BACKGROUND_SHARE)) if background else 0
+            wait = max(wait, bucket.wait_time(now, reserved))
+        return max(wait, 0.0)
+
+    async def acquire(self, region: str, method: str, background: bool = False):
+        # The lock is FIFO, so callers of the same method are served in the order they arrived. Background
+        # calls queue separately and stop at their share of each window, commands never wait behind them.
+        async with self.locks[(region, method, background)]:
+            while (wait := self.wait_time(region, method, background)) > 0:
+                self.throttled += 1
+                await asyncio.sleep(wait)
+            now = time.monotonic()
+            for bucket in self._buckets(region, method):
+                bucket.consume(now)
+
+    def update(self, region: str, method: str, headers):
+        now = time.monotonic()
+        for scope, key in (("App", region), ("Method", (region, method))):
+            limits = parse_rate_limit_header(headers.get(f"X-{scope}-Rate-Limit"))
+            if not limits:
+                continue
+            counts = dict((window, used) for used, window in parse_rate_limit_header(headers.get(f"X-{scope}-Rate-Limit-Count")))
+            store = self.app_buckets if scope == "App" else self.method_buckets
+            buckets = {bucket.window: bucket for bucket in store.get(key, [])}
+            store[key] = [buckets.get(window) or TokenBucket(limit, window) for limit, window in limits]
+            for bucket, (limit, window) in zip(store[key], limits):
+                bucket.sync(limit, counts.get(window, 0), now)
+
+    def penalize(self, region: str, method: str, headers):
+        self.rate_limited += 1
+        retry_after = float(headers.get("Retry-After", 1))
+        limit_type = headers.get("X-Rate-Limit-Type", "service")
+        # Service-level 429s are not caused by our quota, they are only retried for this method
+        key = region if limit_type == "application" else (region, method)
+        self.blocked_until[key] = max(self.blocked_until[key], time.monotonic() + retry_after)
+        logging.warning(f"Riot API rate limited ({limit_type}) on {region} {method}, retrying in {retry_after}s")
+
+class RoutingPool:
+    """Concurrency limit and rate limit state of a single routing value (e.g. "europe" or "euw1")."""
+    def __init__(self, routing: str, concurrency: int, default_app_limit: str):
+        self.routing = routing
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.rate_limiter = RiotRateLimiter(default_app_limit)
+
+class RoutingPools:
+    """One RoutingPool per routing value, created on first use.
+
+    Riot applies its limits per routing value, so a throttled or slow platform only
+    queues its own calls and every platform added to LeagueServer brings its own quota.
+    """
+    def __init__(self, concurrency: int = RIOT_ROUTING_CONCURRENCY, default_app_limit: str = RIOT_DEFAULT_APP_RATE_LIMIT):
+        self.concurrency = concurrency
+        self.default_app_limit = default_app_limit
+        self.pools: Dict[str, RoutingPool] = {}
+
+    def __getitem__(self, routing: str) -> RoutingPool:
+        if routing not in self.pools:
+            self.pools[routing] = RoutingPool(routing, self.concurrency, self.default_app_limit)
+        return self.pools[routing]
+
+    def __iter__(self):
+        return iter(self.pools.values())
+
+    @property
+    def throttled(self) -> int:
+        return sum(pool.rate_limiter.throttled for pool in self)
+
+    @property
+    def rate_limited(self) -> int:
+        return sum(pool.rate_limiter.rate_limited for pool in self)
+
+def rate_limit_middleware(routing_pools: RoutingPools, max_retries: int = RIOT_MAX_RATE_LIMIT_RETRIES, max_server_error_retries: int = RIOT_MAX_SERVER_ERROR_RETRIES):
+    """pulsefire middleware that runs each call in its routing value's pool.
+
+    Calls wait for a token, then a pool slot for the request itself. Calls made under background_calls
+    only use RIOT_BACKGROUND_SHARE of each window. 429s are queued for a retry after Retry-After and 5xx or
+    connection errors are retried with exponential backoff. This is the only layer that retries, pulsefire's
+    http_error_middleware is built with no retries and only raises for the response this one gives up on.
+    """
+    def constructor(next):
+        async def middleware(invocation):
+            region = invocation.params.get("region", "")
+            method = invocation.urlformat
+            pool = routing_pools[region]
+            background = background_calls.get()
+            rate_limited = server_errors = 0
+            while True:
+                await pool.rate_limiter.acquire(region, method, background)
+                # Only the request itself takes a pool slot, waits for a token or a retry leave it to other callers
+                try:
+                    async with pool.semaphore:
+                        response = await next(invocation)
+                except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+                    if server_errors >= max_server_error_retries:
+                        raise
+                    server_errors += 1
+                    await asyncio.sleep(2 ** server_errors)
+                    continue
+                pool.rate_limiter.update(region, method, response.headers)
+                if response.status == 429 and rate_limited < max_retries:
+                    rate_limited += 1
+                    pool.rate_limiter.penalize(region, method, response.headers)
+                elif response.status >= 500 and server_errors < max_server_error_retries:
+                    server_errors += 1
+                    await asyncio.sleep(2 ** server_errors)
+                else:
+                    return response
+                # The discarded response gives its connection back to the pool before the retry
+                response.release()
+        return middleware
+    return constructor
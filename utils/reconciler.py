@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Set
+import discord
+from database import AsyncSessionLocal
+from models.player import Player
+from utils.rate_limiter import TokenBucket, parse_rate_limit_header
+from utils.team_index import TeamIndex
+from config import REGISTERED_ROLE, RECONCILE_RATE_LIMIT, RECONCILE_CONCURRENCY, RECONCILE_MAX_REMOVALS
+
+NICKNAME_LIMIT = 32  # Discord's limit
+TAG_PREFIX = re.compile(r"^\[[^\]]+\] ")
+UNCHANGED = object()
+
+class MemberChange(NamedTuple):
+    member: discord.Member
+    add_roles: List[discord.Role]
+    remove_roles: List[discord.Role]
+    nick: object  # New nickname, None to clear it or UNCHANGED
+
+class ReconcileReport:
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.members = 0
+        self.touched = 0
+        self.roles_added = 0
+        self.roles_removed = 0
+        self.nicknames = 0
+        self.failed = 0
+        self.aborted = False
+        self.missing_roles: Set[str] = set()
+
+    def __str__(self):
+        if self.aborted:
+            return (f"Aborted, {self.roles_removed} roles would be removed from {self.touched}/{self.members} members which is more than "
+                    f"{RECONCILE_MAX_REMOVALS}. Check the database, then run /reconcile with force to apply them.")
+        return (f"{self.touched}/{self.members} members {'to update' if self.dry_run else 'updated'} ({self.roles_added} roles added, "
+                f"{self.roles_removed} roles removed, {self.nicknames} nicknames, {self.failed} failed)")
+
+def team_nickname(tag: str, nickname: str) -> str:
+    return f"[{tag}] {nickname}"[:NICKNAME_LIMIT]
+
+def plan_changes(guild: discord.Guild, players: Dict[int, tuple], team_index: TeamIndex, report: ReconcileReport) -> List[MemberChange]:
+    """Changes that bring every cached member to the state players_table and teams_table describe.
+
+    Registered players have the registered role, the role named after their team and no other team
+    role, and players in a team are nicknamed "[TAG] nickname". Members who are not registered lose
+    those roles, and players not in a team lose a leftover "[TAG] " prefix. Anything else is left alone.
+    """
+    registered_role = guild.get_role(REGISTERED_ROLE)
+    team_roles = {team.id: discord.utils.get(guild.roles, name=team.name) for team in team_index.teams.values()}
+    report.missing_roles = {team_index.teams[team_id].name for team_id, role in team_roles.items() if role is None}
+    # Only these roles are added or removed, every other role of a member is kept
+    reconciled = {role.id for role in team_roles.values() if role} | ({registered_role.id} if registered_role else set())
+
+    changes = list()
+    for member in guild.members:
+        if member.bot:
+            continue
+        report.members += 1
+        player = players.get(member.id)
+        team = team_index.teams.get(player.team_id) if player and player.team_id else None
+
+        wanted = set()
+        if player and registered_role:
+            wanted.add(registered_role)
+        if team and team_roles.get(team.id):
+            wanted.add(team_roles[team.id])
+        current = {role for role in member.roles if role.id in reconciled}
+        add_roles = sorted(wanted - current, key=lambda role: role.id)
+        remove_roles = sorted(current - wanted, key=lambda role: role.id)
+
+        nick = UNCHANGED
+        if member.id != guild.owner_id:
+            if team:
+                desired = team_nickname(team.tag, player.nickname or member.name)
+                if member.nick != desired:
+                    nick = desired
+            elif player and member.nick and TAG_PREFIX.match(member.nick):
+                nick = player.nickname or None
+
+        if add_roles or remove_roles or nick is not UNCHANGED:
+            changes.append(MemberChange(member, add_roles, remove_roles, nick))
+    return changes
+
+class RoleReconciler:
+    """Brings the guild's team roles, registered role and nicknames in line with the database.
+
+    Each member that differs gets a single edit setting their roles and nickname at once, the edits go
+    through a queue worked by RECONCILE_CONCURRENCY workers sharing the RECONCILE_RATE_LIMIT buckets.
+    Run by the Reconciler cog when the bot starts and by /reconcile.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.buckets = [TokenBucket(limit, window) for limit, window in parse_rate_limit_header(RECONCILE_RATE_LIMIT)]
+        self.lock = asyncio.Lock()
+        self.last_report: Optional[ReconcileReport] = None
+
+    @property
+    def running(self) -> bool:
+        return self.lock.locked()
+
+    async def acquire(self):
+        while (wait := max(bucket.wait_time(time.monotonic()) for bucket in self.buckets)) > 0:
+            await asyncio.sleep(wait)
+        now = time.monotonic()
+        for bucket in self.buckets:
+            bucket.consume(now)
+
+    async def run(self, guild: discord.Guild, dry_run: bool = False, force: bool = False) -> ReconcileReport:
+        """Reconcile the guild, unless `force` is set nothing is applied when more than RECONCILE_MAX_REMOVALS
+        roles would be removed, a roster read from an empty or wrong database would strip every member.
+        """
+        async with self.lock:
+            report = ReconcileReport(dry_run)
+            # The roster is read up front so no connection is held while the edits wait on the rate limit
+            async with AsyncSessionLocal() as session:
+                players = {row.discord_id: row for row in await Player.fetch_roster_rows(session)}
+            changes = plan_changes(guild, players, self.bot.team_index, report)
+            report.touched = len(changes)
+            report.roles_added = sum(len(change.add_roles) for change in changes)
+            report.roles_removed = sum(len(change.remove_roles) for change in changes)
+            report.nicknames = sum(change.nick is not UNCHANGED for change in changes)
+            if not dry_run and not force and report.roles_removed > RECONCILE_MAX_REMOVALS:
+                report.aborted = True
+                logging.error(f"Reconciler aborted, {report.roles_removed} roles would be removed from {report.touched} members")
+            elif not dry_run:
+                report.failed = await self.apply(changes)
+            self.last_report = report
+            return report
+
+    async def apply(self, changes: List[MemberChange]) -> int:
+        queue: asyncio.Queue = asyncio.Queue()
+        for change in changes:
+            queue.put_nowait(change)
+        failed = 0
+
+        async def worker():
+            nonlocal failed
+            while not queue.empty():
+                change = queue.get_nowait()
+                await self.acquire()
+                try:
+                    await apply_change(change)
+                except discord.HTTPException as e:
+                    failed += 1
+                    logging.error(f"Could not reconcile {change.member}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(RECONCILE_CONCURRENCY)))
+        return failed
+
+async def apply_change(change: MemberChange):
+    fields = dict()
+    if change.add_roles or change.remove_roles:
+        removed = {role.id for role in change.remove_roles}
+        fields["roles"] = [role for role in change.member.roles if role.id not in removed and not role.is_default()] + change.add_roles
+    if change.nick is not UNCHANGED:
+        fields["nick"] = change.nick
+    await change.member.edit(reason="Reconciled with the database", **fields)
@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from config import RIOT_CACHE_TTLS, RIOT_CACHE_MAX_BYTES
+
+class RiotCache:
+    """In-process LRU cache for Riot API responses with a TTL per endpoint.
+
+    Entries are evicted least recently used first once the estimated size of the
+    cached responses goes over `max_bytes`. Hits and misses are counted per endpoint.
+    """
+    def __init__(self, ttls: Dict[str, float] = RIOT_CACHE_TTLS, max_bytes: int = RIOT_CACHE_MAX_BYTES):
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, int, Any]]" = OrderedDict()
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.evictions = 0
+
+    def get(self, endpoint: str, key: Hashable):
+        """Return the cached value, raises KeyError on a miss or an expired entry."""
+        expires_at, size, value = self.entries[(endpoint, key)]
+        if expires_at <= time.monotonic():
+            self.remove(endpoint, key)
+            raise KeyError((endpoint, key))
+        self.entries.move_to_end((endpoint, key))
+        return value
+
+    def set(self, endpoint: str, key: Hashable, value: Any):
+        ttl = self.ttls.get(endpoint, 0)
+        if ttl <= 0:
+            return
+        self.remove(endpoint, key)
+        size = len(repr(value))
+        self.entries[(endpoint, key)] = (time.monotonic() + ttl, size, value)
+        self.size += size
+        while self.size > self.max_bytes and self.entries:
+            _, (_, evicted_size, _) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def remove(self, endpoint: str, key: Hashable):
+        entry = self.entries.pop((endpoint, key), None)
+        if entry:
+            self.size -= entry[1]
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    async def fetch(self, endpoint: str, key: Hashable, fetcher: Callable[[], Awaitable[Any]], bypass: bool = False, count_misses: bool = True):
+        """Return the cached response for (endpoint, key) or await `fetcher` and cache its result.
+
+        `bypass` always calls `fetcher`, e.g. when the caller needs to see a change made seconds ago.
+        `count_misses` can be turned off when `fetcher` counts them itself, e.g. only when it sends a request.
+        """
+        if not bypass:
+            try:
+                value = self.get(endpoint, key)
+                self.hits[endpoint] += 1
+                return value
+            except KeyError:
+                pass
+        if count_misses:
+            self.misses[endpoint] += 1
+        value = await fetcher()
+        self.set(endpoint, key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "evictions": self.evictions,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+        }
@@ -0,0 +1,60 @@
+import os
+import aiohttp
+from pulsefire.clients import RiotAPIClient
+from pulsefire.middlewares import http_error_middleware, json_response_middleware
+from dotenv import load_dotenv
+from config import RIOT_CONNECTION_POOL_SIZE, RIOT_KEEPALIVE_TIMEOUT
+from utils.rate_limiter import RoutingPools, rate_limit_middleware
+from utils.riot_cache import RiotCache
+from utils.single_flight import SingleFlight
+
+load_dotenv(override=True)
+
+class PooledRiotAPIClient(RiotAPIClient):
+    """RiotAPIClient that is opened once and shared by the whole bot.
+
+    The underlying aiohttp session keeps its TCP/TLS connections alive between calls,
+    so only the first request to each routing host pays for the handshake.
+    Calls are queued in a RoutingPool per routing value instead of pulsefire's default limiter,
+    and the lookup helpers in utils/util_funcs.py keep their responses in `cache` and
+    coalesce identical concurrent lookups through `single_flight`.
+    """
+    def __init__(self, *, pool_size: int = RIOT_CONNECTION_POOL_SIZE, keepalive_timeout: float = RIOT_KEEPALIVE_TIMEOUT, routing_pools: RoutingPools = None, cache: RiotCache = None, **kwargs):
+        self.routing_pools = routing_pools or RoutingPools()
+        self.cache = cache or RiotCache()
+        self.single_flight = SingleFlight()
+        # RIOT_API_BASE_URL can point the bot at benchmarks/riot_stub.py to test without using the key's quota
+        kwargs.setdefault("base_url", os.getenv("RIOT_API_BASE_URL", "https://{region}.api.riotgames.com"))
+        kwargs.setdefault("default_headers", {"X-Riot-Token": os.getenv("RIOT_API_KEY")})
+        kwargs.setdefault("middlewares", [
+            json_response_middleware(),
+            # Retries are left to rate_limit_middleware, which honors Retry-After
+            http_error_middleware(max_retries=0),
+            rate_limit_middleware(self.routing_pools),
+        ])
+        super().__init__(**kwargs)
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+
+    async def __aenter__(self):
+        if self.session:
+            raise RuntimeError(f"{self!r} has been already entered")
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
+        return self
+
+    @property
+    def is_open(self) -> bool:
+        return self.session is not None and not self.session.closed
+
+    async def start(self):
+        if not self.is_open:
+            await self.__aenter__()
+
+    async def close(self):
+        if self.session is not None:
+            await self.__aexit__(None, None, None)
@@ -0,0 +1,58 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class FlightCancelled(Exception):
+    """Set on a flight whose leader was cancelled, its followers start a new flight instead."""
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same (endpoint, key) into a single call.
+
+    The first caller runs `fetcher`, everyone asking for the same key while it is running
+    awaits the same result (or exception) instead of making their own request. If the first
+    caller is cancelled its followers are not, the first of them to wake up runs `fetcher` again.
+    """
+    def __init__(self):
+        self.in_flight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.deduplicated: Dict[str, int] = defaultdict(int)
+
+    async def do(self, endpoint: str, key: Hashable, fetcher: Callable[[], Awaitable[Any]]):
+        joined = False
+        while (future := self.in_flight.get((endpoint, key))) is not None:
+            if not joined:
+                self.deduplicated[endpoint] += 1
+                joined = True
+            try:
+                # Shielded so a waiter being cancelled does not cancel the call for everyone else
+                return await asyncio.shield(future)
+            except FlightCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[(endpoint, key)] = future
+        self.calls[endpoint] += 1
+        try:
+            result = await fetcher()
+        except asyncio.CancelledError:
+            # Cancelling the future would raise CancelledError in the followers' unrelated tasks
+            future.set_exception(FlightCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved, there may be nobody else waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self.in_flight.pop((endpoint, key), None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self.in_flight),
+            "calls": dict(self.calls),
+            "deduplicated": dict(self.deduplicated),
+        }
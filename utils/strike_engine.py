@@ -0,0 +1,108 @@
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.strike import Strike
+from config import STRIKE_ESCALATION, STRIKE_SUSPENSION_THRESHOLD, STRIKE_WHEEL_TICK_SECONDS
+
+def punishment_for(active_strikes: int) -> str:
+    """Punishment for a player or team with `active_strikes` active strikes, the new one included."""
+    return STRIKE_ESCALATION[min(active_strikes, max(STRIKE_ESCALATION))]
+
+class TimerWheel:
+    """Hashed timing wheel, scheduling is O(1) and each tick only looks at the timers of one slot.
+
+    Time is cut into ticks of `tick` seconds and timers are hashed into `size` slots by the tick they are
+    due in. Timers due more than one revolution away share the slot and are skipped until their tick.
+    """
+    def __init__(self, tick: float, size: int = 1440, now: Optional[float] = None):
+        self.tick = tick
+        self.slots: List[List[Tuple[int, Any]]] = [[] for _ in range(size)]
+        self.current = int((now if now is not None else datetime.now().timestamp()) // tick)
+        self.timers = 0
+
+    def schedule(self, when: float, item: Any):
+        # Due in the first tick that ends at or after `when`, never in one that was already processed
+        due = max(math.ceil(when / self.tick), self.current + 1)
+        self.slots[due % len(self.slots)].append((due, item))
+        self.timers += 1
+
+    def advance(self, now: float) -> List[Any]:
+        """Process the ticks up to `now`, returns the items of the timers that are due."""
+        target = int(now // self.tick)
+        if target <= self.current:
+            return []
+        # After a long pause every slot is visited once instead of once per elapsed tick
+        ticks = range(self.current + 1, target + 1) if target - self.current < len(self.slots) else range(target - len(self.slots) + 1, target + 1)
+        expired = list()
+        for tick in ticks:
+            slot = self.slots[tick % len(self.slots)]
+            if not slot:
+                continue
+            due = [item for due, item in slot if due <= target]
+            if due:
+                slot[:] = [(due, item) for due, item in slot if due > target]
+                expired.extend(due)
+        self.current = target
+        self.timers -= len(expired)
+        return expired
+
+class ActiveStrike(NamedTuple):
+    id: int
+    player_id: Optional[int]
+    team_id: Optional[int]
+
+class StrikeCounters:
+    """In-memory count of the active strikes of every player and team, used for eligibility checks.
+
+    Warmed in setup_hook from the active strikes, incremented when a strike is issued and decremented
+    when it expires by the timer wheel, which the Strikes cog advances every STRIKE_WHEEL_TICK_SECONDS.
+    A check is a dictionary lookup, an expired strike is counted for at most one more tick.
+    """
+    def __init__(self):
+        self.players: Counter = Counter()
+        self.teams: Counter = Counter()
+        self.wheel = TimerWheel(STRIKE_WHEEL_TICK_SECONDS)
+
+    async def warm_up(self, session: AsyncSession):
+        self.players.clear()
+        self.teams.clear()
+        self.wheel = TimerWheel(STRIKE_WHEEL_TICK_SECONDS)
+        for strike in await Strike.fetch_active_strikes(session):
+            self.add(strike)
+
+    def add(self, strike: Strike):
+        active = ActiveStrike(strike.id, strike.issued_for_id, strike.issued_for_team_id)
+        if active.player_id is not None:
+            self.players[active.player_id] += 1
+        if active.team_id is not None:
+            self.teams[active.team_id] += 1
+        if strike.expires_at is not None:
+            self.wheel.schedule(strike.expires_at.timestamp(), active)
+
+    def advance(self, now: Optional[datetime] = None) -> List[ActiveStrike]:
+        """Drop the strikes that expired since the last call, returns them."""
+        expired = self.wheel.advance((now or datetime.now()).timestamp())
+        for strike in expired:
+            if strike.player_id is not None:
+                self.players[strike.player_id] -= 1
+                if self.players[strike.player_id] <= 0:
+                    del self.players[strike.player_id]
+            if strike.team_id is not None:
+                self.teams[strike.team_id] -= 1
+                if self.teams[strike.team_id] <= 0:
+                    del self.teams[strike.team_id]
+        return expired
+
+    def player_strikes(self, discord_id: int) -> int:
+        return self.players.get(discord_id, 0)
+
+    def team_strikes(self, team_id: int) -> int:
+        return self.teams.get(team_id, 0)
+
+    def is_player_suspended(self, discord_id: int) -> bool:
+        return self.player_strikes(discord_id) >= STRIKE_SUSPENSION_THRESHOLD
+
+    def is_team_suspended(self, team_id: int) -> bool:
+        return self.team_strikes(team_id) >= STRIKE_SUSPENSION_THRESHOLD
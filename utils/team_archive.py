@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+import logging
+from typing import Dict, List
+import discord
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.player import Player
+from models.team import Team
+from utils.embed_gen import EmbedGenerator
+from utils.enums import TransferType
+from utils.util_funcs import transfer_message
+from config import ARCHIVE_CONCURRENCY, ARCHIVE_PROGRESS_SECONDS
+
+class ArchiveProgress:
+    """Done, failed and total count of every step of a team archive, shown in the followup message."""
+    def __init__(self, team: Team):
+        self.team = team
+        self.steps: Dict[str, List[int]] = {}
+        self.errors: List[str] = []
+        self.finished = False
+
+    def add_step(self, name: str, total: int):
+        self.steps[name] = [0, 0, total]
+
+    def done(self, name: str):
+        self.steps[name][0] += 1
+
+    def failed(self, name: str, error: Exception):
+        self.steps[name][1] += 1
+        self.errors.append(f"{name}: {error}")
+
+    def embed(self) -> discord.Embed:
+        lines = list()
+        for name, (done, failed, total) in self.steps.items():
+            icon = "✅" if done == total else "❌" if done + failed == total else "⏳"
+            lines.append(f"{icon} {name}: {done}/{total}" + (f" ({failed} failed)" if failed else ""))
+        if not self.finished:
+            return EmbedGenerator.default_embed(title="Archiving Team", description=f"Archiving team **{self.team.name} ({self.team.tag})**...\n\n" + "\n".join(lines))
+        if self.errors:
+            errors = "\n".join(f"- {error}" for error in self.errors[:10])
+            return EmbedGenerator.warning_embed(title="Team Archived", description=f"Archived team **{self.team.name} ({self.team.tag})** with errors.\n\n" + "\n".join(lines) + f"\n\n{errors}")
+        return EmbedGenerator.success_embed(title="Team Archived", description=f"Successfully archived team **{self.team.name} ({self.team.tag})**. All related channels have been deleted.\n\n" + "\n".join(lines))
+
+async def archive_team(session: AsyncSession, interaction: discord.Interaction, team: Team, message_id: int) -> ArchiveProgress:
+    """Archive a team, reporting progress by editing the followup message `message_id`.
+
+    The players are removed and the team archived with set-based statements in one transaction, the
+    disband transfers go to the transfer journal, then the channels, role and nicknames are updated
+    concurrently. discord.py waits out each route's rate limit, ARCHIVE_CONCURRENCY bounds how many
+    requests are queued at once. Deleting the role removes it from every member, so members only need
+    their nickname reset.
+    """
+    guild = interaction.guild
+    progress = ArchiveProgress(team)
+    progress.add_step("Database", 1)
+    removed = await Player.remove_all_from_team(session, team.id)
+    await Team.archive(session, team.id)
+    await session.commit()
+    progress.done("Database")
+
+    for discord_id, role in removed:
+        member = guild.get_member(discord_id)
+        message = transfer_message(guild, member.mention if member else f"<@{discord_id}>", team, TransferType.TEAM_DISBAND)
+        interaction.client.transfer_journal.record(discord_id, team.id, TransferType.TEAM_DISBAND.value, role, message)
+
+    channels = [channel for channel in (
+        discord.utils.get(guild.categories, name=team.name),
+        discord.utils.get(guild.text_channels, name=team.name),
+        discord.utils.get(guild.voice_channels, name=team.name),
+    ) if channel]
+    team_role = discord.utils.get(guild.roles, name=team.name)
+    members = [member for member in (guild.get_member(discord_id) for discord_id, _ in removed) if member and member.nick]
+    progress.add_step("Channels", len(channels))
+    progress.add_step("Role", 1 if team_role else 0)
+    progress.add_step("Nicknames", len(members))
+
+    semaphore = asyncio.Semaphore(ARCHIVE_CONCURRENCY)
+    reason = f"Team archived by {interaction.user.name}"
+
+    async def run(step: str, request):
+        async with semaphore:
+            try:
+                await request()
+                progress.done(step)
+            except discord.HTTPException as e:
+                progress.failed(step, e)
+
+    async def report():
+        shown = None
+        while True:
+            await asyncio.sleep(ARCHIVE_PROGRESS_SECONDS)
+            embed = progress.embed()
+            if embed.description == shown:
+                continue
+            try:
+                await interaction.followup.edit_message(message_id, embed=embed, view=None)
+                shown = embed.description
+            except discord.HTTPException as e:
+                logging.error(f"Could not update the archive progress: {e}")
+
+    reporter = asyncio.create_task(report())
+    try:
+        await asyncio.gather(
+            *(run("Channels", lambda channel=channel: channel.delete(reason=reason)) for channel in channels),
+            *([run("Role", lambda: team_role.delete(reason=reason))] if team_role else []),
+            *(run("Nicknames", lambda member=member: member.edit(nick=None, reason=reason)) for member in members),
+        )
+    finally:
+        reporter.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await reporter
+    progress.finished = True
+    return progress
@@ -0,0 +1,70 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, NamedTuple, Tuple
+import discord
+from discord import app_commands
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.team import Team
+
+class IndexedTeam(NamedTuple):
+    id: int
+    name: str
+    tag: str
+
+class TeamIndex:
+    """In-memory prefix index of the active teams, used to autocomplete team arguments.
+
+    The lowercased tag, name and every word of the name are kept in a sorted list of (key, team id),
+    so a lookup is a binary search plus a scan of the matches and never touches the database.
+    Warmed in setup_hook and kept up to date by /create_team and /archive.
+    """
+    def __init__(self):
+        self.teams: Dict[int, IndexedTeam] = {}
+        self.keys: List[Tuple[str, int]] = []
+
+    async def warm_up(self, session: AsyncSession):
+        self.load(await Team.fetch_all(session))
+
+    def load(self, teams: List[Team]):
+        self.teams = {team.id: IndexedTeam(team.id, team.name, team.tag) for team in teams}
+        self.keys = sorted(key for team in self.teams.values() for key in self._keys(team))
+
+    @staticmethod
+    def _keys(team: IndexedTeam):
+        words = {team.tag.lower(), team.name.lower(), *team.name.lower().split()}
+        return [(word, team.id) for word in words]
+
+    def add(self, team: Team):
+        self.remove(team.id)
+        indexed = self.teams[team.id] = IndexedTeam(team.id, team.name, team.tag)
+        for key in self._keys(indexed):
+            insort(self.keys, key)
+
+    def remove(self, team_id: int):
+        team = self.teams.pop(team_id, None)
+        if team:
+            for key in self._keys(team):
+                del self.keys[bisect_left(self.keys, key)]
+
+    def search(self, prefix: str, limit: int = 25) -> List[IndexedTeam]:
+        prefix = prefix.strip().lower()
+        results, seen = list(), set()
+        for position in range(bisect_left(self.keys, (prefix,)), len(self.keys)):
+            key, team_id = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            if team_id not in seen:
+                seen.add(team_id)
+                results.append(self.teams[team_id])
+                if len(results) == limit:
+                    break
+        return results
+
+# Discord allows at most 25 choices of at most 100 characters
+def _choices(interaction: discord.Interaction, current: str, value) -> List[app_commands.Choice[str]]:
+    return [app_commands.Choice(name=f"{team.name} ({team.tag})"[:100], value=value(team)) for team in interaction.client.team_index.search(current)]
+
+async def team_tag_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    return _choices(interaction, current, lambda team: team.tag)
+
+async def team_name_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    return _choices(interaction, current, lambda team: team.name)
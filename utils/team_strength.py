@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.team import Team
+from utils.enums import LeagueRank, LeagueRole, LeagueTier
+
+ROLE_BITS = {role.value: 1 << i for i, role in enumerate(LeagueRole)}
+TOP_PLAYERS = 5
+
+class TeamStrength(NamedTuple):
+    team_id: int
+    league: Optional[str]
+    players: int
+    ranked_players: int
+    average_lp: float  # NaN when no player is ranked, as are the median, top and best
+    median_lp: float
+    top_lp: float  # Average of the best TOP_PLAYERS players
+    best_lp: float
+    role_mask: int
+
+    @property
+    def roles_covered(self) -> List[str]:
+        return [role for role, bit in ROLE_BITS.items() if self.role_mask & bit]
+
+    @property
+    def roles_missing(self) -> List[str]:
+        return [role for role, bit in ROLE_BITS.items() if not self.role_mask & bit]
+
+def approximate_rank(numerical_lp: float) -> str:
+    """Rank matching a numerical LP value, e.g. an average, as Account.numerical_lp encodes it."""
+    if np.isnan(numerical_lp):
+        return "Unranked"
+    value = int(round(numerical_lp))
+    tier = LeagueTier(min(max(value // 1000, 0), len(LeagueTier) - 1))
+    if tier.value >= LeagueTier.MASTER.value:
+        return f"{tier.name.capitalize()} {max(value - tier.value * 1000 - LeagueRank.I.value * 100, 0)} LP"
+    rank = LeagueRank(min(max(value % 1000 // 100, LeagueRank.IV.value), LeagueRank.I.value))
+    return f"{tier.name.capitalize()} {rank.name} {value % 100} LP"
+
+def compute_team_strength(rows: Sequence) -> Dict[int, TeamStrength]:
+    """Statistics of every team from Team.fetch_rank_rows, computed over whole arrays instead of per team.
+
+    Each player counts with their best account. Players are sorted by team and LP (unranked last),
+    so every team is a contiguous slice and the aggregates are reductions over the slice starts.
+    """
+    if not rows:
+        return {}
+    count = len(rows)
+    team_ids = np.fromiter((row.team_id for row in rows), dtype=np.int64, count=count)
+    player_ids = np.fromiter((row.player_id for row in rows), dtype=np.int64, count=count)
+    role_bits = np.fromiter((ROLE_BITS.get(row.role, 0) for row in rows), dtype=np.int64, count=count)
+    lps = np.fromiter((np.nan if row.numerical_lp is None else row.numerical_lp for row in rows), dtype=np.float64, count=count)
+    leagues = {row.team_id: row.league for row in rows}
+    sort_key = np.where(np.isnan(lps), -np.inf, lps)
+
+    # Best account per player: the first row of each player when sorted by LP descending
+    order = np.lexsort((-sort_key, player_ids))
+    first = np.ones(count, dtype=bool)
+    first[1:] = player_ids[order][1:] != player_ids[order][:-1]
+    best = order[first]
+
+    # Players grouped by team, best first
+    order = best[np.lexsort((-sort_key[best], team_ids[best]))]
+    teams, lps, role_bits = team_ids[order], lps[order], role_bits[order]
+    starts = np.flatnonzero(np.r_[True, teams[1:] != teams[:-1]])
+    sizes = np.diff(np.r_[starts, len(teams)])
+    positions = np.arange(len(teams)) - np.repeat(starts, sizes)
+
+    ranked = ~np.isnan(lps)
+    ranked_lps = np.where(ranked, lps, 0.0)
+    ranked_counts = np.add.reduceat(ranked, starts)
+    top = ranked & (positions < TOP_PLAYERS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = np.add.reduceat(ranked_lps, starts) / ranked_counts
+        tops = np.add.reduceat(np.where(top, lps, 0.0), starts) / np.add.reduceat(top, starts)
+    # Ranked players are at the start of each slice, the median is the middle of those
+    has_ranked = ranked_counts > 0
+    low = starts + np.maximum(ranked_counts - 1, 0) // 2
+    high = starts + ranked_counts // 2
+    high = np.where(has_ranked, high, low)
+    medians = np.where(has_ranked, (lps[low] + lps[high]) / 2, np.nan)
+    bests = np.where(has_ranked, lps[starts], np.nan)
+    role_masks = np.bitwise_or.reduceat(role_bits, starts)
+
+    return {
+        int(team_id): TeamStrength(int(team_id), leagues[int(team_id)], int(size), int(ranked_count), float(average), float(median), float(top_lp), float(best_lp), int(role_mask))
+        for team_id, size, ranked_count, average, median, top_lp, best_lp, role_mask
+        in zip(teams[starts], sizes, ranked_counts, averages, medians, tops, bests, role_masks)
+    }
+
+class TeamStrengthCache:
+    """Team statistics computed on first use and kept until something they depend on changes.
+
+    Invalidated by the rank sweep, /account add and /account update (ranks), player_join_team,
+    player_leave_team and members leaving the server (rosters), and team creation, /editleague and
+    /archive (teams). Concurrent callers share one computation.
+    """
+    def __init__(self):
+        self.stats: Optional[Dict[int, TeamStrength]] = None
+        self.computed_at: Optional[datetime] = None
+        self.generation = 0
+        self.lock = asyncio.Lock()
+
+    def invalidate(self):
+        self.stats = None
+        self.generation += 1
+
+    async def get(self, session: AsyncSession) -> Dict[int, TeamStrength]:
+        async with self.lock:
+            if self.stats is not None:
+                return self.stats
+            generation = self.generation
+            stats = compute_team_strength(await Team.fetch_rank_rows(session))
+            self.computed_at = datetime.now()
+            # Not kept if a change was committed while the rows were read, they may predate it
+            if generation == self.generation:
+                self.stats = stats
+            return stats
+
+    async def fetch(self, session: AsyncSession, team_id: int) -> Optional[TeamStrength]:
+        return (await self.get(session)).get(team_id)
+
+    async def seeding(self, session: AsyncSession, league: str) -> List[TeamStrength]:
+        """Teams of a league strongest first, by the average of their best players then their average."""
+        teams = [team for team in (await self.get(session)).values() if team.league == league]
+        return sorted(teams, key=lambda team: (-np.nan_to_num(team.top_lp, nan=-1), -np.nan_to_num(team.average_lp, nan=-1), team.team_id))
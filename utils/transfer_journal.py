@@ -0,0 +1,143 @@
+import asyncio
+import contextlib
+import logging
+from datetime import datetime
+from typing import List, NamedTuple
+import discord
+from database import AsyncSessionLocal
+from sqlalchemy.exc import DataError, IntegrityError
+from models.transfer import Transfer
+from config import TRANSFER_CHANNEL, TRANSFER_JOURNAL_FLUSH_SECONDS, TRANSFER_JOURNAL_MAX_EVENTS, TRANSFER_JOURNAL_MAX_ATTEMPTS
+
+MESSAGE_LIMIT = 2000
+
+class TransferEvent(NamedTuple):
+    player_id: int
+    team_id: int
+    transfer_type: int
+    role_at_transfer: str
+    transfer_date: datetime
+    message: str  # Line posted to TRANSFER_CHANNEL
+    attempts: int = 0  # Failed writes so far
+
+    def columns(self) -> dict:
+        return {"player_id": self.player_id, "team_id": self.team_id, "transfer_type": self.transfer_type,
+                "role_at_transfer": self.role_at_transfer, "transfer_date": self.transfer_date}
+
+class TransferJournal:
+    """Write-behind log of roster changes.
+
+    Transfers are buffered in memory and written with one multi-row INSERT, then their lines are posted
+    to TRANSFER_CHANNEL merged into as few messages as fit, so archiving a team costs one insert and one
+    message instead of one of each per player. A transfer waits at most TRANSFER_JOURNAL_FLUSH_SECONDS,
+    or less once TRANSFER_JOURNAL_MAX_EVENTS are buffered, and close() flushes what is left on shutdown.
+    Transfers the database rejects are dropped, ones that fail to write TRANSFER_JOURNAL_MAX_ATTEMPTS times
+    (e.g. the database is down) as well, so they never hold back the ones recorded after them.
+    """
+    def __init__(self, bot: discord.Client):
+        self.bot = bot
+        self.events: List[TransferEvent] = []
+        self.wakeup = asyncio.Event()
+        self.lock = asyncio.Lock()
+        self.task = None
+        self.flushes = 0
+        self.transfers_written = 0
+        self.messages_posted = 0
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+        await self.flush()
+
+    def record(self, player_id: int, team_id: int, transfer_type: int, role_at_transfer: str, message: str):
+        """Buffer a transfer, call it once the roster change is committed."""
+        self.events.append(TransferEvent(player_id, team_id, transfer_type, role_at_transfer, datetime.now(), message))
+        if len(self.events) >= TRANSFER_JOURNAL_MAX_EVENTS:
+            self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.wakeup.wait(), timeout=TRANSFER_JOURNAL_FLUSH_SECONDS)
+            self.wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Transfer journal flush failed, retrying with the next flush: {e}")
+
+    async def flush(self) -> int:
+        """Write and post the buffered transfers, returns how many there were."""
+        async with self.lock:
+            if not self.events:
+                return 0
+            events, self.events = self.events, []
+            try:
+                written = await self.write(events)
+            except Exception:
+                retry = [event._replace(attempts=event.attempts + 1) for event in events if event.attempts + 1 < TRANSFER_JOURNAL_MAX_ATTEMPTS]
+                if len(retry) < len(events):
+                    logging.error(f"Transfer journal dropped {len(events) - len(retry)} transfers after {TRANSFER_JOURNAL_MAX_ATTEMPTS} failed writes")
+                # Kept in order ahead of the transfers recorded since
+                self.events[:0] = retry
+                raise
+            self.flushes += 1
+            self.transfers_written += len(written)
+            await self.post([event.message for event in written])
+            return len(written)
+
+    async def write(self, events: List[TransferEvent]) -> List[TransferEvent]:
+        """Insert the transfers, returns the ones written.
+
+        A batch the database rejects (e.g. a player row was deleted since) is written again one transfer
+        per savepoint, the transfers that are still rejected can never be written and are dropped.
+        """
+        async with AsyncSessionLocal() as session:
+            try:
+                await Transfer.create_many(session, [event.columns() for event in events])
+                await session.commit()
+                return events
+            except (IntegrityError, DataError):
+                await session.rollback()
+
+            written = list()
+            for event in events:
+                try:
+                    async with session.begin_nested():
+                        await Transfer.create_many(session, [event.columns()])
+                    written.append(event)
+                except (IntegrityError, DataError) as e:
+                    logging.error(f"Transfer journal dropped a transfer the database rejected ({event.columns()}): {e.orig}")
+            await session.commit()
+            return written
+
+    async def post(self, lines: List[str]):
+        channel = self.bot.get_channel(TRANSFER_CHANNEL)
+        if channel is None:
+            logging.error(f"Transfer channel {TRANSFER_CHANNEL} not found, {len(lines)} transfer messages not posted")
+            return
+        for content in merge_lines(lines):
+            try:
+                await channel.send(content)
+                self.messages_posted += 1
+            except discord.HTTPException as e:
+                logging.error(f"Could not post transfer messages: {e}")
+
+def merge_lines(lines: List[str], limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Join lines into as few messages of at most `limit` characters as possible, keeping their order."""
+    messages, current = list(), ""
+    for line in lines:
+        line = line[:limit]
+        if current and len(current) + 1 + len(line) > limit:
+            messages.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        messages.append(current)
+    return messages
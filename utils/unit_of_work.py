@@ -0,0 +1,110 @@
+import logging
+from collections import defaultdict
+from typing import Dict, Optional
+import discord
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from database import engine
+
+class InteractionSession(AsyncSession):
+    """Session used for a whole interaction.
+
+    Model methods flush after every change so generated ids are available right away. Only flushes
+    that insert rows are needed for that, flushes of updates and deletes are left to the next query
+    (autoflush) or the commit so several of them go out together.
+    """
+    def __init__(self, *args, unit_of_work: "UnitOfWork", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.unit_of_work = unit_of_work
+
+    async def flush(self, objects=None):
+        if objects is None and not self.new:
+            if self.dirty or self.deleted:
+                self.unit_of_work.deferred_flushes += 1
+            return
+        await super().flush(objects)
+
+class UnitOfWork:
+    """Database work of one interaction: the interaction check, the command and the helpers it calls
+    share one session on one pooled connection, checked out the first time the session is used.
+
+    Use `async with unit_of_work(interaction) as session:` anywhere an interaction is available, the
+    session stays open when the block ends and is closed by finish_unit_of_work once the interaction
+    is handled. Work that was not committed by then is rolled back.
+
+    Commands that wait on something slow (a confirmation, rate-limited Riot calls) close it first so
+    the connection goes back to the pool, the next `async with` checks out a new one for the writes.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.connection: Optional[AsyncConnection] = None
+        self.session: Optional[InteractionSession] = None
+        self.round_trips = 0
+        self.deferred_flushes = 0
+
+    async def __aenter__(self) -> InteractionSession:
+        if self.session is None:
+            self.connection = await engine.connect()
+            self.connection.sync_connection.info["unit_of_work"] = self
+            self.session = InteractionSession(bind=self.connection, expire_on_commit=False, unit_of_work=self)
+        return self.session
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.session is not None:
+            await self.session.rollback()
+
+    async def close(self):
+        if self.session is None:
+            return
+        try:
+            await self.session.close()
+        finally:
+            self.connection.sync_connection.info.pop("unit_of_work", None)
+            await self.connection.close()
+            self.session = self.connection = None
+
+class RoundTripStats:
+    """Database round trips made per command, filled in as units of work finish."""
+    def __init__(self):
+        self.commands: Dict[str, int] = defaultdict(int)
+        self.round_trips: Dict[str, int] = defaultdict(int)
+        self.deferred_flushes: Dict[str, int] = defaultdict(int)
+
+    def record(self, uow: UnitOfWork):
+        self.commands[uow.name] += 1
+        self.round_trips[uow.name] += uow.round_trips
+        self.deferred_flushes[uow.name] += uow.deferred_flushes
+
+    def average(self, name: str) -> float:
+        return self.round_trips[name] / self.commands[name] if self.commands[name] else 0.0
+
+round_trip_stats = RoundTripStats()
+
+def _count_round_trip(conn, *args):
+    uow = conn.info.get("unit_of_work")
+    if uow is not None:
+        uow.round_trips += 1
+
+# Statements, BEGIN, COMMIT and ROLLBACK each wait for the database
+event.listen(engine.sync_engine, "before_cursor_execute", _count_round_trip)
+for _name in ("begin", "commit", "rollback"):
+    event.listen(engine.sync_engine, _name, _count_round_trip)
+
+def interaction_name(interaction: discord.Interaction) -> str:
+    if interaction.command is not None:
+        return f"/{interaction.command.qualified_name}"
+    return (interaction.data or {}).get("custom_id", "interaction").split(":")[0]
+
+def unit_of_work(interaction: discord.Interaction) -> UnitOfWork:
+    uow = interaction.extras.get("unit_of_work")
+    if uow is None:
+        uow = interaction.extras["unit_of_work"] = UnitOfWork(interaction_name(interaction))
+    return uow
+
+async def finish_unit_of_work(interaction: discord.Interaction):
+    uow = interaction.extras.pop("unit_of_work", None)
+    if uow is None:
+        return
+    await uow.close()
+    round_trip_stats.record(uow)
+    logging.debug(f"{uow.name} made {uow.round_trips} database round trips ({uow.deferred_flushes} flushes deferred)")
@@ -1,8 +1,7 @@
 from time import time
 from typing import Union
-from pulsefire.clients import RiotAPIClient
+from utils.riot_client import PooledRiotAPIClient
 from dotenv import load_dotenv
-from config import TRANSFER_CHANNEL
 from models.player import Player, PlayerAlreadyInTeam, PlayerNotInTeam
 from models.team import Team
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,17 +9,26 @@ from sqlalchemy.exc import SQLAlchemyError
 import os
 import discord
 import datetime
-from models.transfer import Transfer
-from utils.enums import TransferType
+from utils.enums import LeagueServer, TransferType
 
 load_dotenv(override=True)
 
-async def get_account_info(username: str, tag: str, region: str):
-        async with RiotAPIClient(default_headers={"X-Riot-Token": os.getenv("RIOT_API_KEY")}) as client:
-            account = await client.get_account_v1_by_riot_id(region="europe", game_name=username, tag_line=tag)
-            summoner = await client.get_lol_summoner_v4_by_puuid(region=region, puuid=account["puuid"])
-            ranked = await client.get_lol_league_v4_entries_by_summoner(region=region, summoner_id=summoner["id"])
-            return account, summoner, get_solo_queue_data(ranked)
+async def riot_lookup(client: PooledRiotAPIClient, endpoint: str, key, fetcher, bypass_cache: bool = False):
+    # Concurrent lookups of the same key share one request, bypassing lookups never join a flight started
+    # by a cached lookup as that request may have been sent before the change they are waiting for
+    def send():
+        # Counted as a miss by the lookup that sends the request, the ones joining it count as deduplicated
+        client.cache.misses[endpoint] += 1
+        return fetcher()
+    return await client.cache.fetch(endpoint, key, lambda: client.single_flight.do(endpoint, (key, bypass_cache), send), bypass_cache, count_misses=False)
+
+# Both lookups take the bot's shared client (bot.riot_client) so every call reuses its pooled connections.
+# Responses are cached per endpoint, bypass_cache forces fresh data (e.g. to check a profile icon change).
+async def get_account_info(client: PooledRiotAPIClient, username: str, tag: str, region: str, bypass_cache: bool = False):
+    account = await riot_lookup(client, "account", (username.lower(), tag.lower()), lambda: client.get_account_v1_by_riot_id(region=LeagueServer(region).routing, game_name=username, tag_line=tag), bypass_cache)
+    summoner = await riot_lookup(client, "summoner", (region, account["puuid"]), lambda: client.get_lol_summoner_v4_by_puuid(region=region, puuid=account["puuid"]), bypass_cache)
+    ranked = await riot_lookup(client, "league_entries", (region, summoner["id"]), lambda: client.get_lol_league_v4_entries_by_summoner(region=region, summoner_id=summoner["id"]), bypass_cache)
+    return account, summoner, get_solo_queue_data(ranked)
 
 
 def get_solo_queue_data(ranked_data):
@@ -29,12 +37,11 @@ def get_solo_queue_data(ranked_data):
     except StopIteration:
         return None
     
-async def get_account_info_from_puuid(puuid: str, server: str):
-    async with RiotAPIClient(default_headers={"X-Riot-Token": os.getenv("RIOT_API_KEY")}) as client:
-        account = await client.get_account_v1_by_puuid(region="europe", puuid=puuid)
-        summoner = await client.get_lol_summoner_v4_by_puuid(region=server, puuid=puuid)
-        ranked = await client.get_lol_league_v4_entries_by_summoner(region=server, summoner_id=summoner["id"])
-        return account, summoner, get_solo_queue_data(ranked)
+async def get_account_info_from_puuid(client: PooledRiotAPIClient, puuid: str, server: str, bypass_cache: bool = False):
+    account = await riot_lookup(client, "account", puuid, lambda: client.get_account_v1_by_puuid(region=LeagueServer(server).routing, puuid=puuid), bypass_cache)
+    summoner = await riot_lookup(client, "summoner", (server, puuid), lambda: client.get_lol_summoner_v4_by_puuid(region=server, puuid=puuid), bypass_cache)
+    ranked = await riot_lookup(client, "league_entries", (server, summoner["id"]), lambda: client.get_lol_league_v4_entries_by_summoner(region=server, summoner_id=summoner["id"]), bypass_cache)
+    return account, summoner, get_solo_queue_data(ranked)
     
 async def send_dm(interaction: discord.Interaction, member: discord.Member, embed: discord.Embed):
     try:
@@ -46,11 +53,12 @@ async def send_dm(interaction: discord.Interaction, member: discord.Member, embe
 async def player_join_team(session: AsyncSession, interaction: discord.Interaction, player: Player, team: Team, transfer_type: TransferType = TransferType.PLAYER_JOIN):
     try:
         await player.add_to_team(session, team.id)
-        await send_transfer_message(session, interaction, player, team, transfer_type)
         await session.commit()
     except (PlayerAlreadyInTeam, SQLAlchemyError) as e:
         await session.rollback()
         return False, f"Database error: {str(e)}"
+    interaction.client.team_strength.invalidate()
+    await send_transfer_message(interaction, player, team, transfer_type)
 
     member = interaction.guild.get_member(player.discord_id)
     if not member:
@@ -69,11 +77,12 @@ async def player_join_team(session: AsyncSession, interaction: discord.Interacti
 async def player_leave_team(session: AsyncSession, interaction: discord.Interaction, player: Player, team: Team, transfer_type: TransferType = TransferType.PLAYER_LEAVE):
     try:
         await player.remove_from_team(session, team.id)
-        await send_transfer_message(session, interaction, player, team, transfer_type)
         await session.commit()
     except (PlayerNotInTeam, SQLAlchemyError) as e:
         await session.rollback()
         return False, str(e)
+    interaction.client.team_strength.invalidate()
+    await send_transfer_message(interaction, player, team, transfer_type)
 
     member = interaction.guild.get_member(player.discord_id)
     if not member:
@@ -88,26 +97,27 @@ async def player_leave_team(session: AsyncSession, interaction: discord.Interact
     except discord.HTTPException as e:
         return True, f"Database updated, but Discord API error: {str(e)}"
     
-async def send_transfer_message(session: AsyncSession, interaction: discord.Interaction, player: Player, team: Team, transfer_type: TransferType):
-    transfer_channel = interaction.guild.get_channel(TRANSFER_CHANNEL)
+async def send_transfer_message(interaction: discord.Interaction, player: Player, team: Team, transfer_type: TransferType):
+    # Called once the roster change is committed, the transfer journal writes the transfer and posts the
+    # message together with the other recent transfers
     member = interaction.guild.get_member(player.discord_id)
     if not member:
         user = await interaction.client.fetch_user(player.discord_id)
         mention = f"**{user.display_name}**"
     else:
         mention = member.mention
-        
+    message = transfer_message(interaction.guild, mention, team, transfer_type)
+    interaction.client.transfer_journal.record(player.discord_id, team.id, transfer_type.value, player.role, message)
+
+def transfer_message(guild: discord.Guild, mention: str, team: Team, transfer_type: TransferType) -> str:
     if transfer_type == TransferType.PLAYER_LEAVE:
-        message = f"🔴 {mention} left **{team.name}** ({discord.utils.get(interaction.guild.roles, name=team.name).mention}) <t:{int(time())}:f>"
+        return f"🔴 {mention} left **{team.name}** ({discord.utils.get(guild.roles, name=team.name).mention}) <t:{int(time())}:f>"
     elif transfer_type == TransferType.TEAM_DISBAND:
-        message = f"🔴 {mention} left **{team.name}** because the team was disbanded <t:{int(time())}:f>"
+        return f"🔴 {mention} left **{team.name}** because the team was disbanded <t:{int(time())}:f>"
     elif transfer_type == TransferType.PLAYER_JOIN:
-        message = f"🟢 {mention} joined **{team.name}** ({discord.utils.get(interaction.guild.roles, name=team.name).mention})<t:{int(time())}:f>"
+        return f"🟢 {mention} joined **{team.name}** ({discord.utils.get(guild.roles, name=team.name).mention})<t:{int(time())}:f>"
     elif transfer_type == TransferType.TEAM_CREATE:
-        message = f"🟢 {mention} created **{team.name}** ({discord.utils.get(interaction.guild.roles, name=team.name).mention}) <t:{int(time())}:f>"
-        
-    await Transfer.create(session, player.discord_id, team.id, transfer_type.value, player.role)
-    await transfer_channel.send(message)
+        return f"🟢 {mention} created **{team.name}** ({discord.utils.get(guild.roles, name=team.name).mention}) <t:{int(time())}:f>"
     
 def get_multi_opgg(server: str, display_names: list):
     multi_opgg_link = list()
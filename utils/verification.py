@@ -0,0 +1,114 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import discord
+from utils.embed_gen import EmbedGenerator
+from utils.riot_client import PooledRiotAPIClient
+from utils.util_funcs import get_solo_queue_data, riot_lookup
+from config import VERIFICATION_DEADLINE_SECONDS, VERIFICATION_INITIAL_DELAY, VERIFICATION_MAX_DELAY
+
+# Called with (interaction, platform, riot_account, summoner, ranked) once the icon matches, returns the embed to show
+OnVerified = Callable[[discord.Interaction, str, dict, dict, Optional[dict]], Awaitable[discord.Embed]]
+
+class PendingVerification:
+    __slots__ = ("interaction", "riot_account", "platform", "expected_icon", "deadline", "attempts", "on_verified")
+
+    def __init__(self, interaction: discord.Interaction, riot_account: dict, platform: str, expected_icon: int, on_verified: OnVerified):
+        self.interaction = interaction
+        self.riot_account = riot_account
+        self.platform = platform
+        self.expected_icon = expected_icon
+        self.deadline = time.monotonic() + VERIFICATION_DEADLINE_SECONDS
+        self.attempts = 0
+        self.on_verified = on_verified
+
+class OwnershipVerifier:
+    """Checks in the background whether players changed their profile icon to prove account ownership.
+
+    Pending verifications are kept per Discord user (a new /account add replaces the previous one)
+    and polled by a single task, with the delay between polls doubling up to VERIFICATION_MAX_DELAY.
+    The ephemeral /account add message is edited when the icon matches or the deadline passes.
+    """
+    def __init__(self, client: PooledRiotAPIClient):
+        self.client = client
+        self.pending: Dict[int, PendingVerification] = {}
+        self.schedule: List[Tuple[float, int, int, PendingVerification]] = []
+        self.counter = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.polls = set()
+
+    def start(self, interaction: discord.Interaction, riot_account: dict, platform: str, expected_icon: int, on_verified: OnVerified):
+        entry = PendingVerification(interaction, riot_account, platform, expected_icon, on_verified)
+        self.pending[interaction.user.id] = entry
+        self._schedule(interaction.user.id, entry, VERIFICATION_INITIAL_DELAY)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    def cancel(self, user_id: int):
+        self.pending.pop(user_id, None)
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+        self.pending.clear()
+
+    def _schedule(self, user_id: int, entry: PendingVerification, delay: float):
+        heapq.heappush(self.schedule, (time.monotonic() + delay, next(self.counter), user_id, entry))
+        self.wakeup.set()
+
+    async def run(self):
+        while self.pending:
+            self.wakeup.clear()
+            now = time.monotonic()
+            while self.schedule and self.schedule[0][0] <= now:
+                _, _, user_id, entry = heapq.heappop(self.schedule)
+                # Entries replaced by a newer /account add or already finished are skipped
+                if self.pending.get(user_id) is entry:
+                    task = asyncio.create_task(self.poll(user_id, entry))
+                    self.polls.add(task)
+                    task.add_done_callback(self.polls.discard)
+            timeout = self.schedule[0][0] - now if self.schedule else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll(self, user_id: int, entry: PendingVerification):
+        puuid = entry.riot_account["puuid"]
+        try:
+            summoner = await riot_lookup(self.client, "summoner", (entry.platform, puuid), lambda: self.client.get_lol_summoner_v4_by_puuid(region=entry.platform, puuid=puuid), bypass_cache=True)
+        except Exception as e:
+            logging.error(f"Ownership verification poll failed for {user_id}: {e}")
+            summoner = None
+
+        if summoner and summoner["profileIconId"] == entry.expected_icon:
+            self._finish(user_id, entry)
+            try:
+                ranked = await riot_lookup(self.client, "league_entries", (entry.platform, summoner["id"]), lambda: self.client.get_lol_league_v4_entries_by_summoner(region=entry.platform, summoner_id=summoner["id"]))
+                embed = await entry.on_verified(entry.interaction, entry.platform, entry.riot_account, summoner, get_solo_queue_data(ranked))
+            except Exception as e:
+                embed = EmbedGenerator.error_embed(title="Error", description=f"Error adding account, share the error message with the developers: {str(e)}")
+            return await self.edit(entry, embed)
+
+        if time.monotonic() >= entry.deadline:
+            self._finish(user_id, entry)
+            return await self.edit(entry, EmbedGenerator.error_embed(title="Account Verification Failed", description="The profile icon was not changed in time, please use /account add again."))
+
+        if self.pending.get(user_id) is entry:
+            entry.attempts += 1
+            delay = min(VERIFICATION_MAX_DELAY, VERIFICATION_INITIAL_DELAY * 2 ** entry.attempts)
+            self._schedule(user_id, entry, min(delay, max(0.0, entry.deadline - time.monotonic())))
+
+    def _finish(self, user_id: int, entry: PendingVerification):
+        if self.pending.get(user_id) is entry:
+            del self.pending[user_id]
+
+    async def edit(self, entry: PendingVerification, embed: discord.Embed):
+        try:
+            await entry.interaction.edit_original_response(embed=embed, view=None)
+        except discord.HTTPException as e:
+            logging.error(f"Could not edit the verification message: {e}")
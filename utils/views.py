@@ -1,6 +1,6 @@
 import discord
 from models.invite import Invite
-from database import AsyncSessionLocal
+from utils.unit_of_work import finish_unit_of_work, unit_of_work
 import re
 from typing import Dict, List
 from discord import app_commands
@@ -10,7 +10,7 @@ from utils.embed_gen import EmbedGenerator
 from utils.util_funcs import send_dm
 
 class ConfirmView(discord.ui.View):
-    def __init__(self, timeout: float | None = None):
+    def __init__(self, timeout: float | None = 60.0):
         super().__init__(timeout=timeout)
         self.value = None
 
@@ -47,12 +47,20 @@ class InviteApprovalButton(discord.ui.DynamicItem[discord.ui.Button], template=r
         return cls(invite_id, is_approve)
 
     async def callback(self, interaction: discord.Interaction) -> None:
-        await self.handle_approval(interaction)
+        try:
+            await self.handle_approval(interaction)
+        finally:
+            await finish_unit_of_work(interaction)
 
     async def handle_approval(self, interaction: discord.Interaction):
-        async with AsyncSessionLocal() as session:
-            invite = await Invite.fetch_from_id(session, self.invite_id)
+        async with unit_of_work(interaction) as session:
+            invite = await Invite.fetch_from_id(session, self.invite_id, profile="details")
             current_embed = interaction.message.embeds[0]
+            # Approved invites stay active until the invitee accepts, so an answered request is told apart by `approved`.
+            # Invites past their expiry are refused even if the expiry sweeper has not closed the request yet.
+            if not invite or not invite.is_live() or invite.approved is not None:
+                await interaction.response.send_message(embed=EmbedGenerator.error_embed(title="Error", description="This invite was already answered or is no longer active."), ephemeral=True)
+                return
 
             if self.is_approve:
                 current_embed.title = "Invite Approved"